@@ -0,0 +1,166 @@
+"""
+The reveal animations of the Minesweeper application. The engine applies every action
+at once, so the state of the game never waits for an animation. This module only
+decides when each changed tile is shown: the tiles uncovered by a click are shown
+ring by ring outwards from it, and the mines of a lost game one after another outwards
+from the mine that was hit. The front end draws the tiles as they fall due, within a
+time budget for each frame. This module does not depend on pygame.
+"""
+
+
+def spread(ordered, waves):
+    """
+    Splits a list of groups of tiles into at most a number of waves, keeping their order.
+
+    Args:
+        ordered (list): Lists of tiles, in the order they should be shown.
+        waves (int): The largest number of waves to return.
+
+    Returns:
+        list: The waves, each a list of tiles.
+    """
+    if len(ordered) <= waves:
+        return [list(group) for group in ordered]
+
+    result = [[] for _ in range(waves)]
+    for number, group in enumerate(ordered):
+        result[number * waves // len(ordered)].extend(group)
+    return result
+
+
+def cascade_waves(indexes, origin, position, waves):
+    """
+    Groups the tiles uncovered by a click into rings around it, nearest first.
+
+    Args:
+        indexes (list): The indexes of the tiles.
+        origin (tuple): The (gridY, gridX) of the click.
+        position (function): Returns the (gridY, gridX) of an index, such as `Board.position`.
+        waves (int): The largest number of waves to return.
+
+    Returns:
+        list: The waves, each a list of indexes.
+    """
+    originY, originX = origin
+    rings = {}
+    for index in indexes:
+        gridY, gridX = position(index)
+        rings.setdefault(max(abs(gridY - originY), abs(gridX - originX)), []).append(index)
+    return spread([rings[distance] for distance in sorted(rings)], waves)
+
+
+def mine_waves(indexes, origin, position, waves):
+    """
+    Orders the mines of a lost game by their distance from the mine that was hit, one
+    mine to a wave unless there are more mines than waves.
+
+    Args:
+        indexes (list): The indexes of the mines.
+        origin (tuple): The (gridY, gridX) of the mine that was hit.
+        position (function): Returns the (gridY, gridX) of an index, such as `Board.position`.
+        waves (int): The largest number of waves to return.
+
+    Returns:
+        list: The waves, each a list of indexes.
+    """
+    originY, originX = origin
+
+    def distance(index):
+        gridY, gridX = position(index)
+        return (gridY - originY) ** 2 + (gridX - originX) ** 2
+
+    return spread([[index] for index in sorted(indexes, key=distance)], waves)
+
+
+class RevealScheduler:
+    """
+    A class to release changed tiles to be drawn over time.
+
+    Tiles are scheduled as waves, where each wave of a batch falls due an interval after
+    the one before it. Due tiles are taken one at a time, so a frame can stop partway
+    through a wave when its time budget runs out and carry on in the next frame.
+
+    Attributes:
+        pending (set): The indexes of the tiles that have been scheduled but not released,
+                       which are drawn as they were before they changed.
+    """
+
+    def __init__(self):
+        """
+        Initializes a RevealScheduler object with nothing scheduled.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.pending = set()
+        # Each batch is [start, interval, waves, next wave, next tile in that wave]
+        self._batches = []
+
+    @property
+    def busy(self):
+        """
+        bool: True while any tile is waiting to be released.
+        """
+        return bool(self._batches)
+
+    def schedule(self, waves, start, interval):
+        """
+        Schedules waves of tiles, the first at a start time and each after that an
+        interval later.
+
+        Args:
+            waves (list): The waves, each a list of indexes.
+            start (int): The time in milliseconds the first wave falls due.
+            interval (int): The milliseconds between waves.
+
+        Returns:
+            None
+        """
+        waves = [wave for wave in waves if wave]
+        if not waves:
+            return
+        self._batches.append([start, interval, waves, 0, 0])
+        for wave in waves:
+            self.pending.update(wave)
+
+    def due(self, now):
+        """
+        Releases the tiles that have fallen due, one at a time. Tiles are only released
+        as they are taken, so the caller can stop when it runs out of time.
+
+        Args:
+            now (int): The current time in milliseconds.
+
+        Yields:
+            The index of each released tile.
+        """
+        for batch in list(self._batches):
+            start, interval, waves, waveNumber, tileNumber = batch
+            while waveNumber < len(waves) and start + waveNumber * interval <= now:
+                wave = waves[waveNumber]
+                while tileNumber < len(wave):
+                    index = wave[tileNumber]
+                    tileNumber += 1
+                    batch[3], batch[4] = waveNumber, tileNumber
+                    self.pending.discard(index)
+                    yield index
+                waveNumber, tileNumber = waveNumber + 1, 0
+                batch[3], batch[4] = waveNumber, tileNumber
+            if waveNumber == len(waves):
+                self._batches.remove(batch)
+
+    def clear(self):
+        """
+        Drops everything that is scheduled, such as when a new game starts.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._batches.clear()
+        self.pending.clear()
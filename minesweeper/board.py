@@ -0,0 +1,400 @@
+"""
+The board model used by the Minesweeper application. The state of every tile
+(mine, revealed, flag and neighbouring mine count) is stored in compact byte
+arrays rather than in an object per tile, and is exposed as NumPy arrays for
+vectorised operations. This module does not depend on pygame.
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+
+# The largest share of tiles that can be mines. Random placement within the cluster
+# limit jams at around 53% of the tiles on a large board, so denser boards are refused.
+MAX_DENSITY = 0.5
+
+# The number of times a placement that jams is restarted before generation gives up
+GENERATE_ATTEMPTS = 5
+
+
+def validate_size(width, height, mineCount):
+    """
+    Checks that a board of a given size can be generated.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the board is empty, or has too many mines to place beside the
+                    first click within the cluster limit.
+    """
+    if width < 1 or height < 1:
+        raise ValueError("A board must have at least one row and column, not {}x{}".format(width, height))
+    if mineCount < 0:
+        raise ValueError("The mine count cannot be negative")
+    # Only the first click itself is always kept free, as `generate` frees just that tile
+    # when its neighbours leave too little room, such as on a board under three tiles across
+    if mineCount > width * height - 1:
+        raise ValueError("{} mines do not fit beside the first click on a {}x{} board"
+                         .format(mineCount, width, height))
+    if mineCount > MAX_DENSITY * width * height:
+        raise ValueError("{} mines is too many for a {}x{} board, which can hold at most {} ({:.0%} of the tiles)"
+                         .format(mineCount, width, height, int(MAX_DENSITY * width * height), MAX_DENSITY))
+
+
+class Board:
+    """
+    A class to store and update the state of a Minesweeper board.
+
+    Each state is held in a flat, row-major bytearray, so a single tile can be read
+    quickly by its index `gridY * width + gridX`. The same memory is also exposed as
+    a 2D NumPy array for whole-board operations.
+
+    Attributes:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines placed when the board is generated.
+        size (int): The total number of tiles.
+        mineCells, revealedCells, flagCells, countCells (bytearray): The flat state of each tile.
+        mine, revealed, flag, count (numpy.ndarray): 2D views of the flat states.
+        minePositions (list): The indexes of every mine once the board is generated.
+        revealedCount (int): The number of safe tiles that have been revealed.
+        flagCount (int): The number of flags placed.
+        exploded (int or None): The index of the mine that was revealed, if any.
+        generated (bool): Whether the mines have been placed.
+    """
+
+    def __init__(self, width, height, mineCount):
+        """
+        Initializes an empty Board object.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines to place when the board is generated.
+
+        Returns:
+            None
+        """
+        self.width = width
+        self.height = height
+        self.mineCount = mineCount
+        self.size = width * height
+
+        self.mineCells = bytearray(self.size)
+        self.revealedCells = bytearray(self.size)
+        self.flagCells = bytearray(self.size)
+        self.countCells = bytearray(self.size)
+
+        self.mine = np.frombuffer(self.mineCells, dtype=np.bool_).reshape(height, width)
+        self.revealed = np.frombuffer(self.revealedCells, dtype=np.bool_).reshape(height, width)
+        self.flag = np.frombuffer(self.flagCells, dtype=np.bool_).reshape(height, width)
+        self.count = np.frombuffer(self.countCells, dtype=np.uint8).reshape(height, width)
+
+        self.minePositions = []
+        self.revealedCount = 0
+        self.flagCount = 0
+        self.exploded = None
+        self.generated = False
+
+    def index(self, gridY, gridX):
+        """
+        Returns the flat index of a tile.
+
+        Args:
+            gridY (int): The y-coordinate on the grid.
+            gridX (int): The x-coordinate on the grid.
+
+        Returns:
+            int: The flat index of the tile.
+        """
+        return gridY * self.width + gridX
+
+    def position(self, index):
+        """
+        Returns the grid coordinates of a tile.
+
+        Args:
+            index (int): The flat index of the tile.
+
+        Returns:
+            tuple: The (gridY, gridX) of the tile.
+        """
+        return divmod(index, self.width)
+
+    def neighbours(self, index):
+        """
+        Returns the indexes of the tiles surrounding a tile, excluding the tile itself.
+
+        Args:
+            index (int): The flat index of the tile.
+
+        Returns:
+            list: The flat indexes of up to eight neighbouring tiles.
+        """
+        gridY, gridX = divmod(index, self.width)
+        return [y * self.width + x
+                for y in range(max(gridY - 1, 0), min(gridY + 2, self.height))
+                for x in range(max(gridX - 1, 0), min(gridX + 2, self.width))
+                if y != gridY or x != gridX]
+
+    @property
+    def cleared(self):
+        """
+        bool: Whether every safe tile on the board has been revealed.
+        """
+        return self.revealedCount == self.size - self.mineCount
+
+    def generate(self, gridY, gridX, seed=0):
+        """
+        Randomly place the mines on the board, keeping the first click location and its
+        neighbours free of mines, and avoiding placing more than four mines in any 3x3
+        area centred on a newly placed mine. If the mines do not fit outside the first
+        click area, which can happen on a board under three tiles wide or high, only the
+        first click location is kept free.
+
+        Mines are drawn with a partial Fisher-Yates shuffle of the tiles outside the first
+        click area, while a running count of the mines in each tile's 3x3 area is kept. A
+        tile that is too crowded when drawn can never become eligible again, so every tile
+        is drawn at most once and each attempt takes at most `size` draws. An unlucky order
+        can jam before every mine is placed on a dense board, so a jammed placement is
+        restarted with a new order, up to GENERATE_ATTEMPTS times.
+
+        Args:
+            gridY (int): The y-coordinate of the first click.
+            gridX (int): The x-coordinate of the first click.
+            seed (int): A seed for reproducible boards, or 0 for a random board.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the mines do not fit beside the first click location, or every
+                        attempt jammed before all the mines were placed.
+        """
+        rng = random.Random(seed) if seed != 0 else random.Random()
+
+        start = self.index(gridY, gridX)
+        safe = set(self.neighbours(start))
+        safe.add(start)
+
+        candidates = [index for index in range(self.size) if index not in safe]
+        if self.mineCount > len(candidates):
+            candidates = [index for index in range(self.size) if index != start]
+        if self.mineCount > len(candidates):
+            raise ValueError("Cannot place {} mines beside the first click on a {}x{} board"
+                             .format(self.mineCount, self.width, self.height))
+
+        mostPlaced = 0
+        for _ in range(GENERATE_ATTEMPTS):
+            minePositions = self.place_randomly(candidates, rng)
+            if len(minePositions) == self.mineCount:
+                self.place_mines(minePositions)
+                return
+            mostPlaced = max(mostPlaced, len(minePositions))
+
+        raise ValueError("Could not place {} mines on a {}x{} board within the cluster limit in {} attempts, "
+                         "the most placed was {}".format(self.mineCount, self.width, self.height,
+                                                        GENERATE_ATTEMPTS, mostPlaced))
+
+    def place_randomly(self, candidates, rng):
+        """
+        Make one attempt at drawing the mine positions, stopping once every mine has been
+        placed or every candidate has been drawn.
+
+        Args:
+            candidates (list): The indexes of the tiles that may be mines, shuffled in place.
+            rng (random.Random): The random number generator to draw with.
+
+        Returns:
+            list: The indexes of the mines placed, which may be fewer than the mine count.
+        """
+        # The number of mines in the 3x3 area centred on each tile
+        clusterCounts = bytearray(self.size)
+        minePositions = []
+
+        for draw in range(len(candidates)):
+            if len(minePositions) == self.mineCount:
+                break
+
+            pick = rng.randrange(draw, len(candidates))
+            candidates[draw], candidates[pick] = candidates[pick], candidates[draw]
+            index = candidates[draw]
+
+            if clusterCounts[index] > 3:
+                continue
+
+            minePositions.append(index)
+            clusterCounts[index] += 1
+            for neighbour in self.neighbours(index):
+                clusterCounts[neighbour] += 1
+
+        return minePositions
+
+    def place_mines(self, minePositions):
+        """
+        Place mines at the given positions, such as a layout generated ahead of time,
+        and count the mines surrounding every tile.
+
+        Args:
+            minePositions (list): The flat indexes of the mines.
+
+        Returns:
+            None
+        """
+        for index in minePositions:
+            self.mineCells[index] = 1
+        self.minePositions = list(minePositions)
+
+        self.count_neighbours()
+        self.generated = True
+
+    def count_neighbours(self):
+        """
+        Count the mines surrounding every tile at once, by summing the eight shifted
+        copies of the padded mine array.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        padded = np.pad(self.mine, 1).astype(np.uint8)
+        counts = np.zeros((self.height, self.width), dtype=np.uint8)
+        for y in range(3):
+            for x in range(3):
+                if y != 1 or x != 1:
+                    counts += padded[y:y + self.height, x:x + self.width]
+        self.count[:] = counts
+
+    def reveal(self, gridY, gridX):
+        """
+        Reveal a tile, flood filling outwards across any connected tiles that have no
+        neighbouring mines. Flags on revealed tiles are removed. If the tile is a mine,
+        it is recorded as `exploded`.
+
+        Args:
+            gridY (int): The y-coordinate of the tile to reveal.
+            gridX (int): The x-coordinate of the tile to reveal.
+
+        Returns:
+            list: The flat indexes of the tiles that were newly revealed.
+        """
+        return self.reveal_many([self.index(gridY, gridX)])
+
+    def reveal_many(self, indexes):
+        """
+        Reveal several tiles at once, with a single flood fill outwards from all of them.
+        Flags on revealed tiles are removed. The first mine revealed, if any, is
+        recorded as `exploded`.
+
+        Args:
+            indexes (list): The flat indexes of the tiles to reveal.
+
+        Returns:
+            list: The flat indexes of the tiles that were newly revealed.
+        """
+        revealed = []
+        for index in indexes:
+            if self.revealedCells[index]:
+                continue
+            self.reveal_cell(index)
+            revealed.append(index)
+            if self.mineCells[index] and self.exploded is None:
+                self.exploded = index
+
+        return revealed + self.flood_fill(revealed)
+
+    def reveal_cell(self, index):
+        """
+        Mark a single tile as revealed, removing its flag and updating the counters.
+
+        Args:
+            index (int): The flat index of the tile.
+
+        Returns:
+            None
+        """
+        self.revealedCells[index] = 1
+        if self.flagCells[index]:
+            self.flagCells[index] = 0
+            self.flagCount -= 1
+        if not self.mineCells[index]:
+            self.revealedCount += 1
+
+    def flood_fill(self, indexes):
+        """
+        Iteratively reveal the unrevealed neighbours of every empty tile reachable from
+        the given revealed tiles.
+
+        Args:
+            indexes (list): The flat indexes of tiles that have just been revealed.
+
+        Returns:
+            list: The flat indexes of the tiles that were newly revealed.
+        """
+        width = self.width
+        height = self.height
+        revealedCells = self.revealedCells
+        countCells = self.countCells
+        mineCells = self.mineCells
+        revealed = []
+
+        queue = deque(index for index in indexes if countCells[index] == 0 and not mineCells[index])
+        while queue:
+            index = queue.popleft()
+            gridY, gridX = divmod(index, width)
+            for y in range(max(gridY - 1, 0), min(gridY + 2, height)):
+                for x in range(max(gridX - 1, 0), min(gridX + 2, width)):
+                    neighbour = y * width + x
+                    if revealedCells[neighbour]:
+                        continue
+
+                    self.reveal_cell(neighbour)
+                    revealed.append(neighbour)
+                    if countCells[neighbour] == 0 and not mineCells[neighbour]:
+                        queue.append(neighbour)
+
+        return revealed
+
+    def reveal_mines(self):
+        """
+        Reveal every mine on the board.
+
+        Args:
+            None
+
+        Returns:
+            list: The flat indexes of the mines that were newly revealed.
+        """
+        revealed = [index for index in self.minePositions if not self.revealedCells[index]]
+        for index in revealed:
+            self.revealedCells[index] = 1
+        return revealed
+
+    def set_flag(self, gridY, gridX, flag):
+        """
+        Place or remove a flag on an unrevealed tile.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+            flag (bool): True to place a flag, False to remove it.
+
+        Returns:
+            bool: True if the flag state of the tile changed.
+        """
+        index = self.index(gridY, gridX)
+        if self.revealedCells[index] or self.flagCells[index] == flag:
+            return False
+
+        self.flagCells[index] = 1 if flag else 0
+        self.flagCount += 1 if flag else -1
+        return True
@@ -0,0 +1,696 @@
+"""
+An endless Minesweeper board, split into square chunks that are generated as they
+are explored. The mines of each chunk are derived from the game's seed and the
+chunk's coordinates, so any chunk can be rebuilt at any time. Only a bounded number
+of chunks are kept in memory: when a chunk falls out of the cache, its revealed and
+flag states are written to a compact on-disk store if it has been played on, and a
+chunk that has not been played on is simply dropped and rebuilt if it is seen again.
+
+ChunkedBoard offers the same interface as board.Board that the engine uses, with
+(gridY, gridX) tuples in place of flat indexes, so an EndlessGame is played with the
+same actions as a normal Game. Running this module explores a board and checks that
+evicting and reloading chunks never changes the game:
+    python minesweeper/chunks.py --moves 2000 --cache 16
+"""
+
+import argparse
+import math
+import struct
+import tempfile
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import numpy as np
+
+import engine
+
+# Below this mine density, regions with no neighbouring mines can grow without bound,
+# so a single reveal could flood fill forever
+MIN_DENSITY = 0.15
+
+
+class Chunk:
+    """
+    A class to store the state of one chunk of a ChunkedBoard, in the same flat,
+    row-major bytearrays as board.Board.
+
+    Attributes:
+        chunkY, chunkX (int): The coordinates of the chunk.
+        mineCells, revealedCells, flagCells, countCells (bytearray): The flat state of each tile.
+        modified (bool): Whether any tile has been revealed or flagged since the chunk was built.
+    """
+
+    def __init__(self, chunkY, chunkX, mines, counts):
+        """
+        Initializes a Chunk object with no tiles revealed or flagged.
+
+        Args:
+            chunkY (int): The y-coordinate of the chunk.
+            chunkX (int): The x-coordinate of the chunk.
+            mines (numpy.ndarray): The 2D mine layout of the chunk.
+            counts (numpy.ndarray): The 2D neighbouring mine count of each tile.
+
+        Returns:
+            None
+        """
+        self.chunkY = chunkY
+        self.chunkX = chunkX
+        self.mineCells = bytearray(mines.astype(np.uint8).tobytes())
+        self.countCells = bytearray(counts.astype(np.uint8).tobytes())
+        self.revealedCells = bytearray(len(self.mineCells))
+        self.flagCells = bytearray(len(self.mineCells))
+        self.modified = False
+
+
+class ChunkStore:
+    """
+    A compact on-disk store for the state of chunks that have left the cache.
+
+    Only the revealed and flag states are stored, as bitmaps compressed with zlib, since
+    the mines and counts can be rebuilt from the seed. Records are kept in a single file,
+    and the position of the latest record of each chunk is kept in memory. A chunk that is
+    saved again is written over its old record if it fits, and is otherwise appended,
+    leaving the old record unused. Once the unused records take up more than
+    COMPACT_RATIO of the file and at least COMPACT_MIN_BYTES, the live records are
+    rewritten to the start of the file, so the file grows with the number of chunks
+    played on rather than with the time played.
+
+    Attributes:
+        file (file): The binary file the records are written to.
+        size (int): The number of bytes of the file in use.
+        unused (int): The number of bytes held by records that have been replaced.
+        compactions (int): The number of times the file has been compacted.
+    """
+
+    RECORD = struct.Struct("<iiI")
+
+    # The share of the file, and the least number of bytes, that unused records must
+    # take up before the file is compacted
+    COMPACT_RATIO = 0.5
+    COMPACT_MIN_BYTES = 64 * 1024
+
+    def __init__(self, file=None):
+        """
+        Initializes the ChunkStore object.
+
+        Args:
+            file (file or None): A binary file opened for reading and writing, or None for a
+                                 temporary file that is deleted when it is closed.
+
+        Returns:
+            None
+        """
+        self.file = file if file is not None else tempfile.TemporaryFile()
+        self.size = 0
+        self.unused = 0
+        self.compactions = 0
+        # The (offset, length, capacity) of the data of each chunk's record
+        self._records = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, chunkYX):
+        return chunkYX in self._records
+
+    def save(self, chunk):
+        """
+        Write the revealed and flag states of a chunk, over its previous record if the
+        new one fits.
+
+        Args:
+            chunk (Chunk): The chunk to save.
+
+        Returns:
+            None
+        """
+        revealed = np.packbits(np.frombuffer(chunk.revealedCells, dtype=np.uint8))
+        flags = np.packbits(np.frombuffer(chunk.flagCells, dtype=np.uint8))
+        data = zlib.compress(revealed.tobytes() + flags.tobytes())
+
+        chunkYX = (chunk.chunkY, chunk.chunkX)
+        record = self._records.get(chunkYX)
+        if record is not None and len(data) <= record[2]:
+            offset, _, capacity = record
+        else:
+            if record is not None:
+                self.unused += self.RECORD.size + record[2]
+            offset, capacity = self.size + self.RECORD.size, len(data)
+            self.size += self.RECORD.size + len(data)
+
+        self.file.seek(offset - self.RECORD.size)
+        self.file.write(self.RECORD.pack(chunk.chunkY, chunk.chunkX, len(data)) + data)
+        self._records[chunkYX] = (offset, len(data), capacity)
+
+        if self.unused >= self.COMPACT_MIN_BYTES and self.unused > self.COMPACT_RATIO * self.size:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrite the live records to the start of the file, dropping the records that have
+        been replaced, and truncate the file.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        records = []
+        for chunkYX, (offset, length, _) in sorted(self._records.items(), key=lambda item: item[1][0]):
+            self.file.seek(offset)
+            records.append((chunkYX, self.file.read(length)))
+
+        self.size = 0
+        self.file.seek(0)
+        for (chunkY, chunkX), data in records:
+            self.file.write(self.RECORD.pack(chunkY, chunkX, len(data)) + data)
+            self._records[(chunkY, chunkX)] = (self.size + self.RECORD.size, len(data), len(data))
+            self.size += self.RECORD.size + len(data)
+        self.file.truncate(self.size)
+        self.unused = 0
+        self.compactions += 1
+
+    def load(self, chunk):
+        """
+        Restore the revealed and flag states of a chunk, if the store has them.
+
+        Args:
+            chunk (Chunk): The rebuilt chunk, with no tiles revealed or flagged.
+
+        Returns:
+            bool: True if the chunk's states were restored.
+        """
+        record = self._records.get((chunk.chunkY, chunk.chunkX))
+        if record is None:
+            return False
+
+        offset, length, _ = record
+        self.file.seek(offset)
+        data = np.frombuffer(zlib.decompress(self.file.read(length)), dtype=np.uint8)
+        cells = len(chunk.revealedCells)
+        half = len(data) // 2
+        chunk.revealedCells[:] = np.unpackbits(data[:half])[:cells].tobytes()
+        chunk.flagCells[:] = np.unpackbits(data[half:])[:cells].tobytes()
+        chunk.modified = True
+        return True
+
+    def close(self):
+        """
+        Close the file of the store.
+        """
+        self.file.close()
+
+
+class CellView:
+    """
+    A read-only view of one state of every tile of a ChunkedBoard, indexed by (gridY, gridX),
+    so that code written for the flat state bytearrays of board.Board can read it. Before the
+    board is generated, every tile reads as 0.
+    """
+
+    def __init__(self, chunkedBoard, name):
+        self.board = chunkedBoard
+        self.name = name
+
+    def __getitem__(self, key):
+        if not self.board.generated:
+            return 0
+        chunk, local = self.board.locate(*key)
+        return getattr(chunk, self.name)[local]
+
+
+class ChunkedBoard:
+    """
+    A class to store and update the state of an endless Minesweeper board.
+
+    Tiles are identified by (gridY, gridX) tuples, which can be negative. The board has the
+    attributes and methods of board.Board that the engine uses, with an unbounded mine count,
+    so flags are never limited and the board is never cleared.
+
+    Attributes:
+        chunkSize (int): The number of tiles along each side of a chunk.
+        density (float): The probability of each tile being a mine.
+        cacheSize (int): The largest number of chunks kept in memory.
+        store (ChunkStore): The store that chunks which have been played on are evicted to.
+        seed (int): The seed the chunks are derived from, set when the board is generated.
+        width, height (None): The board has no edges.
+        mineCount (float): Infinity, as the board has no edges.
+        mineCells, revealedCells, flagCells, countCells (CellView): Views of the state of each tile.
+        revealedCount (int): The number of safe tiles that have been revealed.
+        flagCount (int): The number of flags placed.
+        exploded (tuple or None): The (gridY, gridX) of the mine that was revealed, if any.
+        generated (bool): Whether the first click has been made, fixing the seed and safe area.
+        stats (dict): Counts of chunks built, evicted, saved to and loaded from the store.
+    """
+
+    width = None
+    height = None
+    mineCount = math.inf
+    cleared = False
+
+    def __init__(self, chunkSize=32, density=0.18, cacheSize=64, store=None):
+        """
+        Initializes an empty ChunkedBoard object.
+
+        Args:
+            chunkSize (int): The number of tiles along each side of a chunk.
+            density (float): The probability of each tile being a mine.
+            cacheSize (int): The largest number of chunks kept in memory, at least 1.
+            store (ChunkStore or None): The store for evicted chunks, or None for a temporary one.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the density is below MIN_DENSITY.
+        """
+        if density < MIN_DENSITY:
+            raise ValueError("A mine density of {} is below the minimum of {}, so reveals may never end"
+                             .format(density, MIN_DENSITY))
+
+        self.chunkSize = chunkSize
+        self.density = density
+        self.cacheSize = max(1, cacheSize)
+        self.store = store if store is not None else ChunkStore()
+        self.seed = 0
+        self._safe = set()
+        self._chunks = OrderedDict()
+
+        self.mineCells = CellView(self, "mineCells")
+        self.revealedCells = CellView(self, "revealedCells")
+        self.flagCells = CellView(self, "flagCells")
+        self.countCells = CellView(self, "countCells")
+
+        self.revealedCount = 0
+        self.flagCount = 0
+        self.exploded = None
+        self.generated = False
+        self.stats = {"built": 0, "evicted": 0, "saved": 0, "loaded": 0}
+
+    def index(self, gridY, gridX):
+        """
+        Returns the key of a tile, which is its coordinates.
+
+        Args:
+            gridY (int): The y-coordinate on the grid.
+            gridX (int): The x-coordinate on the grid.
+
+        Returns:
+            tuple: The (gridY, gridX) of the tile.
+        """
+        return gridY, gridX
+
+    def position(self, key):
+        """
+        Returns the grid coordinates of a tile.
+
+        Args:
+            key (tuple): The key of the tile.
+
+        Returns:
+            tuple: The (gridY, gridX) of the tile.
+        """
+        return key
+
+    def neighbours(self, key):
+        """
+        Returns the keys of the eight tiles surrounding a tile.
+
+        Args:
+            key (tuple): The key of the tile.
+
+        Returns:
+            list: The (gridY, gridX) of each neighbouring tile.
+        """
+        gridY, gridX = key
+        return [(y, x) for y in (gridY - 1, gridY, gridY + 1) for x in (gridX - 1, gridX, gridX + 1)
+                if y != gridY or x != gridX]
+
+    def generate(self, gridY, gridX, seed=0):
+        """
+        Fix the seed the chunks are derived from, and keep the first click location and its
+        neighbours free of mines. Chunks are only built when they are first touched.
+
+        Args:
+            gridY (int): The y-coordinate of the first click.
+            gridX (int): The x-coordinate of the first click.
+            seed (int): A seed for a reproducible board, or 0 for a random board.
+
+        Returns:
+            None
+        """
+        self.seed = seed if seed != 0 else int.from_bytes(np.random.bytes(4), "little")
+        self._safe = {(gridY, gridX)} | set(self.neighbours((gridY, gridX)))
+        self._chunks.clear()
+        self.generated = True
+
+    def mine_layout(self, chunkY, chunkX):
+        """
+        Derive the mine layout of a chunk from the seed and the chunk's coordinates.
+
+        Args:
+            chunkY (int): The y-coordinate of the chunk.
+            chunkX (int): The x-coordinate of the chunk.
+
+        Returns:
+            numpy.ndarray: A 2D boolean array of the chunk's mines.
+        """
+        size = self.chunkSize
+        rng = np.random.default_rng([self.seed, chunkY % 2 ** 32, chunkX % 2 ** 32])
+        mines = rng.random((size, size)) < self.density
+        for gridY, gridX in self._safe:
+            if gridY // size == chunkY and gridX // size == chunkX:
+                mines[gridY % size, gridX % size] = False
+        return mines
+
+    def build_chunk(self, chunkY, chunkX):
+        """
+        Build a chunk from its mine layout, counting the mines around each tile including
+        those in the neighbouring chunks, and restore its state from the store if it has one.
+
+        Args:
+            chunkY (int): The y-coordinate of the chunk.
+            chunkX (int): The x-coordinate of the chunk.
+
+        Returns:
+            Chunk: The built chunk.
+        """
+        size = self.chunkSize
+        # The chunk's mines surrounded by a border of the neighbouring chunks' mines
+        padded = np.zeros((size + 2, size + 2), dtype=np.uint8)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                mines = self.mine_layout(chunkY + dy, chunkX + dx)
+                rows = slice(size - 1, size) if dy < 0 else slice(0, 1) if dy > 0 else slice(0, size)
+                columns = slice(size - 1, size) if dx < 0 else slice(0, 1) if dx > 0 else slice(0, size)
+                padY = 0 if dy < 0 else size + 1 if dy > 0 else 1
+                padX = 0 if dx < 0 else size + 1 if dx > 0 else 1
+                block = mines[rows, columns]
+                padded[padY:padY + block.shape[0], padX:padX + block.shape[1]] = block
+
+        counts = np.zeros((size, size), dtype=np.uint8)
+        for y in range(3):
+            for x in range(3):
+                if y != 1 or x != 1:
+                    counts += padded[y:y + size, x:x + size]
+
+        chunk = Chunk(chunkY, chunkX, padded[1:-1, 1:-1], counts)
+        self.stats["built"] += 1
+        if self.store.load(chunk):
+            self.stats["loaded"] += 1
+        return chunk
+
+    def chunk(self, chunkY, chunkX):
+        """
+        Returns a chunk, building it if it is not in the cache and evicting the least
+        recently used chunk if the cache is full.
+
+        Args:
+            chunkY (int): The y-coordinate of the chunk.
+            chunkX (int): The x-coordinate of the chunk.
+
+        Returns:
+            Chunk: The chunk.
+        """
+        chunks = self._chunks
+        chunk = chunks.get((chunkY, chunkX))
+        if chunk is not None:
+            chunks.move_to_end((chunkY, chunkX))
+            return chunk
+
+        chunk = chunks[(chunkY, chunkX)] = self.build_chunk(chunkY, chunkX)
+        while len(chunks) > self.cacheSize:
+            _, evicted = chunks.popitem(last=False)
+            self.stats["evicted"] += 1
+            if evicted.modified:
+                self.store.save(evicted)
+                self.stats["saved"] += 1
+        return chunk
+
+    def locate(self, gridY, gridX):
+        """
+        Returns the chunk holding a tile and the tile's flat index within it.
+
+        Args:
+            gridY (int): The y-coordinate on the grid.
+            gridX (int): The x-coordinate on the grid.
+
+        Returns:
+            tuple: The Chunk and the flat index of the tile in it.
+        """
+        size = self.chunkSize
+        return self.chunk(gridY // size, gridX // size), (gridY % size) * size + gridX % size
+
+    @property
+    def loadedChunks(self):
+        """
+        int: The number of chunks in memory.
+        """
+        return len(self._chunks)
+
+    def reveal(self, gridY, gridX):
+        """
+        Reveal a tile, flood filling outwards across any connected tiles that have no
+        neighbouring mines, across chunk boundaries.
+
+        Args:
+            gridY (int): The y-coordinate of the tile to reveal.
+            gridX (int): The x-coordinate of the tile to reveal.
+
+        Returns:
+            list: The keys of the tiles that were newly revealed.
+        """
+        return self.reveal_many([(gridY, gridX)])
+
+    def reveal_many(self, keys):
+        """
+        Reveal several tiles at once, with a single flood fill outwards from all of them.
+        Flags on revealed tiles are removed. The first mine revealed, if any, is
+        recorded as `exploded`.
+
+        Args:
+            keys (list): The keys of the tiles to reveal.
+
+        Returns:
+            list: The keys of the tiles that were newly revealed.
+        """
+        revealed = []
+        for key in keys:
+            chunk, local = self.locate(*key)
+            if chunk.revealedCells[local]:
+                continue
+            self.reveal_cell(chunk, local)
+            revealed.append(key)
+            if chunk.mineCells[local] and self.exploded is None:
+                self.exploded = key
+
+        return revealed + self.flood_fill(revealed)
+
+    def reveal_cell(self, chunk, local):
+        """
+        Mark a single tile as revealed, removing its flag and updating the counters.
+
+        Args:
+            chunk (Chunk): The chunk holding the tile.
+            local (int): The flat index of the tile within the chunk.
+
+        Returns:
+            None
+        """
+        chunk.revealedCells[local] = 1
+        chunk.modified = True
+        if chunk.flagCells[local]:
+            chunk.flagCells[local] = 0
+            self.flagCount -= 1
+        if not chunk.mineCells[local]:
+            self.revealedCount += 1
+
+    def flood_fill(self, keys):
+        """
+        Iteratively reveal the unrevealed neighbours of every empty tile reachable from
+        the given revealed tiles. Each tile is looked up through its own chunk, so the fill
+        crosses chunk boundaries, and chunks it leaves may be evicted and reloaded safely.
+
+        Args:
+            keys (list): The keys of tiles that have just been revealed.
+
+        Returns:
+            list: The keys of the tiles that were newly revealed.
+        """
+        revealed = []
+        queue = deque()
+        for key in keys:
+            chunk, local = self.locate(*key)
+            if chunk.countCells[local] == 0 and not chunk.mineCells[local]:
+                queue.append(key)
+
+        while queue:
+            gridY, gridX = queue.popleft()
+            for neighbour in self.neighbours((gridY, gridX)):
+                chunk, local = self.locate(*neighbour)
+                if chunk.revealedCells[local]:
+                    continue
+
+                self.reveal_cell(chunk, local)
+                revealed.append(neighbour)
+                if chunk.countCells[local] == 0 and not chunk.mineCells[local]:
+                    queue.append(neighbour)
+
+        return revealed
+
+    def reveal_mines(self):
+        """
+        Reveal every mine in the chunks held in memory, which include those in view.
+
+        Args:
+            None
+
+        Returns:
+            list: The keys of the mines that were newly revealed.
+        """
+        size = self.chunkSize
+        revealed = []
+        for chunk in self._chunks.values():
+            for local in range(len(chunk.mineCells)):
+                if chunk.mineCells[local] and not chunk.revealedCells[local]:
+                    chunk.revealedCells[local] = 1
+                    chunk.modified = True
+                    localY, localX = divmod(local, size)
+                    revealed.append((chunk.chunkY * size + localY, chunk.chunkX * size + localX))
+        return revealed
+
+    def set_flag(self, gridY, gridX, flag):
+        """
+        Place or remove a flag on an unrevealed tile. Flags can only be placed once the
+        board has been generated, as the chunks are rebuilt when it is.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+            flag (bool): True to place a flag, False to remove it.
+
+        Returns:
+            bool: True if the flag state of the tile changed.
+        """
+        if not self.generated:
+            return False
+
+        chunk, local = self.locate(gridY, gridX)
+        if chunk.revealedCells[local] or chunk.flagCells[local] == flag:
+            return False
+
+        chunk.flagCells[local] = 1 if flag else 0
+        chunk.modified = True
+        self.flagCount += 1 if flag else -1
+        return True
+
+    def close(self):
+        """
+        Close the store of evicted chunks.
+        """
+        self.store.close()
+
+
+class EndlessGame(engine.Game):
+    """
+    A game of Minesweeper on a ChunkedBoard. It is played with the same actions as
+    engine.Game, with tiles identified by (gridY, gridX) tuples. It can be lost but never
+    won, and flags are not limited.
+    """
+
+    def __init__(self, seed=0, chunkSize=32, density=0.18, cacheSize=64, store=None):
+        """
+        Initializes an EndlessGame object with an ungenerated board.
+
+        Args:
+            seed (int): A seed for a reproducible board, or 0 for a random board.
+            chunkSize (int): The number of tiles along each side of a chunk.
+            density (float): The probability of each tile being a mine.
+            cacheSize (int): The largest number of chunks kept in memory.
+            store (ChunkStore or None): The store for evicted chunks, or None for a temporary one.
+
+        Returns:
+            None
+        """
+        self._boardOptions = (chunkSize, density, cacheSize, store)
+        super().__init__(ChunkedBoard.width, ChunkedBoard.height, ChunkedBoard.mineCount, seed)
+
+    def new_board(self, width, height, mineCount):
+        """
+        Creates the chunked board the game is played on.
+
+        Args:
+            width, height (None): The board has no edges.
+            mineCount (float): Infinity, as the board has no edges.
+
+        Returns:
+            ChunkedBoard: The new board.
+        """
+        return ChunkedBoard(*self._boardOptions)
+
+
+def explore(game, moves, rng):
+    """
+    Play random reveals and flags near the frontier of revealed tiles, avoiding known
+    mines, so the explored area keeps growing.
+
+    Args:
+        game (EndlessGame): The game to play, which is restarted from its seed on a loss.
+        moves (int): The number of actions to apply.
+        rng (numpy.random.Generator): The source of the random moves.
+
+    Returns:
+        list: The actions that were applied.
+    """
+    actions = []
+    gridY = gridX = 0
+    for _ in range(moves):
+        gridY += int(rng.integers(-6, 7))
+        gridX += int(rng.integers(-4, 9))
+        action = "toggle_flag" if rng.random() < 0.1 else "reveal"
+        # Only reveal tiles that are known to be safe, so a single game explores far
+        if action == "reveal" and game.board.generated and game.board.mineCells[(gridY, gridX)]:
+            action = "toggle_flag"
+        actions.append((action, gridY, gridX))
+        game.apply([actions[-1]])
+    return actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explore an endless Minesweeper board.")
+    parser.add_argument("--moves", type=int, default=2000, help="actions to apply")
+    parser.add_argument("--cache", type=int, default=16, help="chunks kept in memory")
+    parser.add_argument("--chunk", type=int, default=32, help="tiles along each side of a chunk")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the board")
+    args = parser.parse_args()
+
+    game = EndlessGame(args.seed, args.chunk, cacheSize=args.cache)
+    start = time.perf_counter()
+    actions = explore(game, args.moves, np.random.default_rng(args.seed))
+    elapsed = time.perf_counter() - start
+    gameBoard = game.board
+
+    # The same actions on a board that never evicts must give the same game
+    reference = EndlessGame(args.seed, args.chunk, cacheSize=2 ** 31)
+    for action in actions:
+        reference.apply([action])
+    chunkKeys = set(reference.board._chunks)
+    matches = all(bytes(gameBoard.chunk(*key).revealedCells) == bytes(chunk.revealedCells) and
+                  bytes(gameBoard.chunk(*key).flagCells) == bytes(chunk.flagCells)
+                  for key, chunk in reference.board._chunks.items())
+
+    print("actions    {} in {:.3f} s, state {}".format(len(actions), elapsed, game.state))
+    print("revealed   {} tiles, {} flags, across {} chunks".format(
+        gameBoard.revealedCount, gameBoard.flagCount, len(chunkKeys)))
+    print("memory     {} of {} chunks held".format(gameBoard.loadedChunks, args.cache))
+    print("store      {} chunks in {} bytes, {} unused, {} compactions".format(
+        len(gameBoard.store), gameBoard.store.size, gameBoard.store.unused, gameBoard.store.compactions))
+    print("chunks     {built} built, {evicted} evicted, {saved} saved, {loaded} loaded".format(**gameBoard.stats))
+    print("matches    {}".format(matches and gameBoard.revealedCount == reference.board.revealedCount))
+    raise SystemExit(0 if matches else 1)
+
+
+if __name__ == "__main__":
+    main()
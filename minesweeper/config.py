@@ -69,4 +69,59 @@ RESOLUTION = 720
 TAB_SIZE = 100
 
 # Gameplay
-FPS = 60
\ No newline at end of file
+FPS = 60
+
+# Difficulty presets as (name, grid width, grid height, mine count)
+DIFFICULTIES = [
+    ("EASY", 10, 8, 10),
+    ("MEDIUM", 18, 14, 40),
+    ("HARD", 24, 20, 99)
+]
+
+# Tile sizes in pixels that the board can be zoomed between with the mouse wheel. Boards that
+# do not fit the window are panned with the arrow keys.
+MIN_TILE_SIZE = 16
+MAX_TILE_SIZE = 96
+# Tile size multiplier for each step of the mouse wheel
+ZOOM_STEP = 1.25
+# Pixels the board moves each frame while an arrow key is held
+PAN_SPEED = 12
+
+# Endless mode: the board is generated in square chunks of CHUNK_SIZE tiles as it is explored,
+# with each tile a mine with a probability of ENDLESS_MINE_DENSITY (at least 0.15). At most
+# CHUNK_CACHE_SIZE chunks are kept in memory, and played chunks are moved to a temporary file.
+ENDLESS_TILE_SIZE = 40
+CHUNK_SIZE = 32
+ENDLESS_MINE_DENSITY = 0.18
+CHUNK_CACHE_SIZE = 64
+
+# Reveal animation: the tiles uncovered by a click are shown ring by ring outwards from it,
+# CASCADE_INTERVAL milliseconds apart, and the mines of a lost game one after another
+# MINE_INTERVAL milliseconds apart. Each animation is sped up to last at most its maximum
+# duration, and at most REVEAL_FRAME_BUDGET milliseconds of a frame are spent drawing it.
+ANIMATE_REVEALS = True
+CASCADE_INTERVAL = 12
+CASCADE_MAX_DURATION = 360
+MINE_INTERVAL = 60
+MINE_MAX_DURATION = 2400
+REVEAL_FRAME_BUDGET = 4
+
+# Number of places shown for each difficulty on the leaderboard
+LEADERBOARD_SIZE = 3
+
+# Take boards that can be solved without guessing from a pool generated in the background
+NO_GUESS_BOARDS = False
+
+# Print loop rate, presented frames per second and CPU time per loop to the terminal
+SHOW_FRAME_STATS = False
+
+# Print the time taken by each phase of starting the game once the first frame is presented,
+# and whether it was presented within STARTUP_BUDGET_MS milliseconds of the game starting to load
+SHOW_STARTUP_REPORT = False
+STARTUP_BUDGET_MS = 500
+
+# Save a replay of every finished game, which can be played back with replay.py,
+# keeping only the newest REPLAY_LIMIT replays in REPLAY_FOLDER
+RECORD_REPLAYS = True
+REPLAY_FOLDER = "data/replays"
+REPLAY_LIMIT = 100
\ No newline at end of file
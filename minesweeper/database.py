@@ -1,47 +1,49 @@
-import sqlite3
-from sqlite3 import Error
+import atexit
 import datetime
+import queue
+import sys
+import threading
+
+import storage
+
 
 class Database:
     """
-    A class to manage a SQLite database for a Minesweeper game.
+    A class to manage the users and scores of a Minesweeper game, stored by a storage
+    backend. It keeps the cached leaderboard and the background score writer, so every
+    backend gets them.
 
     Attributes:
-        db_file (str): The path to the SQLite database file.
-        conn (sqlite3.Connection): The database connection.
+        db_file (str): The location of the data: a SQLite database file, ":memory:",
+                       "memory:" or "tcp://host:port" (see `storage.open_storage`).
+        backend (storage.Storage): The backend the data is stored by.
         timestamp (datetime.datetime): The current timestamp.
+        leaderboardStats (dict): Counts of leaderboard lookups answered from the cache (hits) and from the database (misses).
     """
 
-    def __init__(self, db_file):
+    def __init__(self, db_file, readers=2, journalMode="WAL", timeout=5):
         """
         Initializes the Database object.
 
         Args:
-            db_file (str): The path to the SQLite database file.
+            db_file (str): The location of the data, such as the path to a SQLite database file.
+            readers (int): The number of reader connections in the pool of a SQLite database.
+            journalMode (str): The SQLite journal mode to use, such as "WAL" or "DELETE".
+            timeout (float): The seconds a connection waits for a locked SQLite database.
 
         Returns:
             None
         """
         self.db_file = db_file
-        self.conn = self.initiate_connection()
+        self.backend = storage.open_storage(db_file, readers=readers, journalMode=journalMode, timeout=timeout)
         self.timestamp = datetime.datetime.now()
-
-    def initiate_connection(self):
-        """
-        Establishes a database connection.
-
-        Args:
-            None
-
-        Returns:
-            sqlite3.Connection or None: The database connection or None if connection failed.
-        """
-        try:
-            return sqlite3.connect(self.db_file)
-        except Error as err:
-            print("initiate_connection error:")
-            print(err)
-            return None
+        # The places of each difficulty, as (limit, [(score, user_id, username, date), ...])
+        self._leaderboardCache = {}
+        self.leaderboardStats = {"hits": 0, "misses": 0}
+        # The username of each user created or looked up, so a new score can be cached
+        # without reading the user back from the backend
+        self._usernames = {}
+        self._writer = None
 
     def create_tables(self):
         """
@@ -53,27 +55,7 @@ class Database:
         Returns:
             None
         """
-        conn = self.conn
-        sql_users_table = """CREATE TABLE IF NOT EXISTS users(
-                            id INTEGER NOT NULL PRIMARY KEY,
-                            username TEXT NOT NULL,
-                            join_date TIMESTAMP NOT NULL)
-                            """
-        sql_scores_table = """CREATE TABLE IF NOT EXISTS scores(
-                            id INTEGER NOT NULL PRIMARY KEY,
-                            score INTEGER NOT NULL,
-                            date TIMESTAMP NOT NULL,
-                            difficulty INTEGER NOT NULL,
-                            user_id INTEGER NOT NULL,
-                            FOREIGN KEY (user_id) REFERENCES users (id))
-                            """
-        try:
-            cur = conn.cursor()
-            cur.execute(sql_users_table)
-            cur.execute(sql_scores_table)
-        except Error as err:
-            print("create_tables error:")
-            print(err)
+        self.backend.create_tables()
 
     def create_user(self, username):
         """
@@ -85,16 +67,9 @@ class Database:
         Returns:
             int or None: The ID of the user or None if the user already exists.
         """
-        conn = self.conn
-        cur = conn.cursor()
-        sql_insert_user = """INSERT INTO users(username, join_date) VALUES (?, ?)"""
-        user_tuple = (username, self.timestamp)
-        cur.execute("SELECT * FROM users WHERE username=?", (username,))
-        if not cur.fetchone():
-            cur.execute(sql_insert_user, user_tuple)
-        conn.commit()
-        cur.execute("SELECT id FROM users WHERE username=?", (username,))
-        return cur.fetchone()[0]
+        user_id = self.backend.create_user(username, str(self.timestamp))
+        self._usernames[user_id] = username
+        return user_id
 
     def submit_score(self, score, difficulty, user_id):
         """
@@ -108,17 +83,70 @@ class Database:
         Returns:
             int or None: The ID of the score entry or None if the score is less than 1.
         """
-        conn = self.conn
-        cur = conn.cursor()
-        sql = """INSERT INTO scores(score, difficulty, date, user_id) VALUES (?, ?, ?, ?)"""
         if score >= 1:
-            user_tuple = (score, difficulty, self.timestamp, user_id)
-            cur.execute(sql, user_tuple)
-            conn.commit()
-            return cur.lastrowid
+            score_id = self.backend.add_scores([(score, difficulty, str(self.timestamp), user_id)])
+            self.cache_score(score, difficulty, user_id, self.timestamp)
+            return score_id
         else:
             return None
 
+    def queue_score(self, score, difficulty, user_id):
+        """
+        Submits a score to be written to the database by a background thread, so that the
+        caller never waits for the disk or a locked database. The cached leaderboard is
+        updated straight away.
+
+        Args:
+            score (int): The score to submit.
+            difficulty (int): The difficulty level of the game.
+            user_id (int): The user's ID.
+
+        Returns:
+            bool: True if the score was queued, or False if the score is less than 1.
+        """
+        if score < 1:
+            return False
+
+        if self._writer is None:
+            self._writer = ScoreWriter(self.backend)
+            self._writer.start()
+            atexit.register(self.close)
+
+        date = datetime.datetime.now()
+        self._writer.submit(score, difficulty, date, user_id)
+        self.cache_score(score, difficulty, user_id, date)
+        return True
+
+    def flush(self):
+        """
+        Waits until every queued score has been written to the database.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """
+        Writes any queued scores, stops the background writer and closes the backend.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
     def get_all_data(self):
         """
         Retrieves and prints all user and score data from the database.
@@ -129,42 +157,81 @@ class Database:
         Returns:
             None
         """
-        conn = self.conn
-        cur = conn.cursor()
-        sql_users_query = """SELECT * FROM users"""
-        sql_scores_query = """SELECT * FROM scores ORDER BY difficulty ASC"""
-        cur.execute(sql_users_query)
-        users_records = cur.fetchall()
+        users_records, scores_records = self.backend.get_all_data()
         print("Users:")
         for record in users_records:
             print(record)
-        cur.execute(sql_scores_query)
-        scores_records = cur.fetchall()
         print("\nScores:")
         for record in scores_records:
             print(record)
 
-    def get_leaderboard(self):
+    def get_leaderboard(self, limit=3, difficulties=3, refresh=False):
         """
-        Retrieves the top 3 scores for each difficulty level from the database.
+        Retrieves the top scores for each difficulty level, with the best score of each user
+        ranked within its difficulty.
+
+        The places are cached for each difficulty and kept up to date by `submit_score`, so
+        the backend is only queried for difficulties that are not cached yet, with a single
+        query for all of them.
 
         Args:
-            None
+            limit (int): The number of places to retrieve for each difficulty.
+            difficulties (int): The number of difficulty levels.
+            refresh (bool): True to discard the cache and query the database, such as after
+                            another process has written to it.
 
         Returns:
-            list: A list of lists, where each inner list contains user information, highscore, difficulty, and timestamp.
-        """
-        conn = self.conn
-        cur = conn.cursor()
-        sql_query = """SELECT user_id, MIN(score), date FROM scores 
-                       WHERE difficulty=? GROUP BY user_id 
-                       ORDER BY score ASC LIMIT 3"""
-        leaderboard = []
-        for difficulty in range(3):
-            cur.execute(sql_query, (difficulty,))
-            results = cur.fetchall()
-            leaderboard.append(results)
-        return leaderboard
+            list: A list for each difficulty, containing (username, highscore, timestamp) tuples in order of place.
+        """
+        cache = self._leaderboardCache
+        if refresh:
+            cache.clear()
+
+        missing = [difficulty for difficulty in range(difficulties)
+                   if difficulty not in cache or cache[difficulty][0] < limit]
+        self.leaderboardStats["hits"] += difficulties - len(missing)
+        self.leaderboardStats["misses"] += len(missing)
+
+        if missing:
+            places = self.backend.get_leaderboard(limit, difficulties)
+            for difficulty in missing:
+                cache[difficulty] = (limit, places[difficulty])
+
+        return [[(username, score, date) for score, _, username, date in cache[difficulty][1][:limit]]
+                for difficulty in range(difficulties)]
+
+    def cache_score(self, score, difficulty, user_id, date):
+        """
+        Updates the cached places of a difficulty with a newly submitted score. The
+        username is taken from the users created or looked up through this object, such as
+        the player, so the backend is only read for a user it has not seen.
+
+        Args:
+            score (int): The submitted score.
+            difficulty (int): The difficulty level of the game.
+            user_id (int): The user's ID.
+            date (datetime.datetime): The timestamp of the score.
+
+        Returns:
+            None
+        """
+        if difficulty not in self._leaderboardCache:
+            return
+
+        limit, entries = self._leaderboardCache[difficulty]
+        for entry in entries:
+            if entry[1] == user_id:
+                if entry[0] <= score:
+                    return
+                entries.remove(entry)
+                break
+
+        username = self._usernames.get(user_id)
+        if username is None:
+            username = self.get_user(user_id)[1]
+        entries.append((score, user_id, username, str(date)))
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        del entries[limit:]
 
     def get_highscore(self, difficulty, user_id):
         """
@@ -177,10 +244,7 @@ class Database:
         Returns:
             tuple or None: A tuple containing the highscore and timestamp, or None if no highscore is found.
         """
-        conn = self.conn
-        cur = conn.cursor()
-        cur.execute("SELECT MIN(score), date FROM scores WHERE user_id=? AND difficulty=?", (user_id, difficulty,))
-        result = cur.fetchone()
+        result = self.backend.get_highscore(difficulty, user_id)
         if result:
             return result[0], difficulty, result[1]
 
@@ -194,10 +258,10 @@ class Database:
         Returns:
             tuple or None: A tuple containing user information (id, username, join_date), or None if the user doesn't exist.
         """
-        conn = self.conn
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE id=?", (user_id,))
-        return cur.fetchone()
+        user = self.backend.get_user(user_id)
+        if user is not None:
+            self._usernames[user_id] = user[1]
+        return user
 
     def purge_data(self):
         """
@@ -209,14 +273,144 @@ class Database:
         Returns:
             None
         """
-        conn = self.conn
-        sql_delete_users = """DELETE FROM users"""
-        sql_delete_scores = """DELETE FROM scores"""
-        try:
-            cur = conn.cursor()
-            cur.execute(sql_delete_users)
-            cur.execute(sql_delete_scores)
-        except Error as err:
-            print("purge_data error:")
-            print(err)
-        conn.commit()
\ No newline at end of file
+        self.backend.purge()
+        self._leaderboardCache.clear()
+        self._usernames.clear()
+
+
+class ScoreWriter:
+    """
+    A class that writes scores to a storage backend from a background thread.
+
+    Scores are taken from a queue, and every score waiting in the queue is added in a
+    single call to the backend, so a burst of scores costs one commit or one round trip.
+    A batch that fails because the database is locked, such as by another process, or
+    because the connection to a server was lost, is retried with a growing delay, up to
+    `maxAttempts` times. A batch that fails with any other error, that runs out of
+    attempts, or that is still failing when the writer is closed, is dropped.
+
+    Attributes:
+        backend (storage.Storage): The backend the scores are written to.
+        batchSize (int): The largest number of scores inserted in one transaction.
+        maxAttempts (int): The most times a batch is tried before it is dropped.
+        retryDelay (float): The seconds before the first retry, doubled for each retry after it.
+        written (int): The number of scores written so far.
+        dropped (int): The number of scores that could not be written.
+    """
+
+    def __init__(self, backend, batchSize=100, maxAttempts=8, retryDelay=0.05):
+        """
+        Initializes the ScoreWriter object.
+
+        Args:
+            backend (storage.Storage): The backend the scores are written to.
+            batchSize (int): The largest number of scores inserted in one transaction.
+            maxAttempts (int): The most times a batch is tried before it is dropped.
+            retryDelay (float): The seconds before the first retry.
+
+        Returns:
+            None
+        """
+        self.backend = backend
+        self.batchSize = batchSize
+        self.maxAttempts = maxAttempts
+        self.retryDelay = retryDelay
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ScoreWriter", daemon=True)
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self._thread.start()
+
+    def submit(self, score, difficulty, date, user_id):
+        """
+        Adds a score to the queue to be written.
+
+        Args:
+            score (int): The score to write.
+            difficulty (int): The difficulty level of the game.
+            date (datetime.datetime): The timestamp of the score.
+            user_id (int): The user's ID.
+
+        Returns:
+            None
+        """
+        self._queue.put((score, difficulty, str(date), user_id))
+
+    def flush(self):
+        """
+        Waits until every score in the queue has been written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Writes every score in the queue, then stops the background thread. A batch that is
+        waiting to be retried is dropped rather than holding up the close.
+        """
+        if self._thread.is_alive():
+            self._closing.set()
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        """
+        Writes batches of scores from the queue until it is closed.
+        """
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batchSize:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [row for row in batch if row is not None]
+            running = len(rows) == len(batch)
+            if rows:
+                self._write(rows)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, rows):
+        """
+        Writes a batch of scores, retrying with a growing delay while the error is
+        retryable, and dropping the batch once it runs out of attempts or the writer
+        is closed.
+        """
+        delay = self.retryDelay
+        for attempt in range(1, self.maxAttempts + 1):
+            try:
+                self.backend.add_scores(rows)
+                self.written += len(rows)
+                return
+            except Exception as err:
+                print("ScoreWriter error:")
+                print(err)
+                if not storage.is_retryable(err) or attempt == self.maxAttempts:
+                    break
+            # Waiting on the event returns early when the writer is being closed
+            if self._closing.wait(delay):
+                break
+            delay *= 2
+
+        print("ScoreWriter dropped {} score(s)".format(len(rows)))
+        self.dropped += len(rows)
+
+
+if __name__ == "__main__":
+    # Check that the frequent queries read the tables through an index rather than scanning them
+    database = Database(sys.argv[1] if len(sys.argv) > 1 else "data/database.sqlite")
+    database.create_tables()
+    plans = database.backend.query_plans()
+    for name, plan in plans.items():
+        print(name)
+        for line in plan:
+            print("    " + line)
+    sys.exit(1 if storage.full_scans(plans) else 0)
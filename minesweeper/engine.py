@@ -0,0 +1,259 @@
+"""
+The game engine for the Minesweeper application. It applies the rules of the
+game (generating the board on the first reveal, revealing, flagging, chording,
+and detecting a win or loss) to a Board, without depending on pygame or a
+display, so games can be played by tools and servers as well as the interface.
+"""
+
+import board
+from config import DIFFICULTIES
+
+# Game states
+READY = "ready"
+PLAYING = "playing"
+WON = "won"
+LOST = "lost"
+
+
+class Game:
+    """
+    A class to play a single game of Minesweeper through a set of actions.
+
+    Every action takes grid coordinates and returns the flat indexes of the tiles whose
+    state changed, so that an interface only has to redraw those tiles.
+
+    Attributes:
+        board (board.Board): The board being played.
+        seed (int): The seed used to generate the board, or 0 for a random board.
+        layouts (object or None): A source of mine layouts generated ahead of time.
+        state (str): One of READY, PLAYING, WON or LOST.
+        firstClick (tuple or None): The (gridY, gridX) the board was generated around.
+        layout (list or None): The mine positions taken from `layouts`, or None if the
+                               board was generated from the seed.
+    """
+
+    def __init__(self, width, height, mineCount, seed=0, layouts=None):
+        """
+        Initializes a Game object with an ungenerated board.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines on the board.
+            seed (int): A seed for a reproducible board, or 0 for a random board.
+            layouts (object or None): An object with a `take(width, height, mineCount, gridY, gridX)`
+                                      method, such as a generator.BoardPool, returning the mine
+                                      positions for a first click or None if it has none.
+
+        Returns:
+            None
+        """
+        self.board = self.new_board(width, height, mineCount)
+        self.seed = seed
+        self.layouts = layouts
+        self.state = READY
+        self.firstClick = None
+        self.layout = None
+
+    def new_board(self, width, height, mineCount):
+        """
+        Creates the board the game is played on. A game played on another kind of board,
+        such as an endless one, overrides this.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines on the board.
+
+        Returns:
+            board.Board: The new board.
+        """
+        return board.Board(width, height, mineCount)
+
+    @classmethod
+    def from_difficulty(cls, difficulty, seed=0):
+        """
+        Creates a Game using one of the difficulty presets.
+
+        Args:
+            difficulty (int): The index of the preset in DIFFICULTIES (0: EASY, 1: MEDIUM, 2: HARD).
+            seed (int): A seed for a reproducible board, or 0 for a random board.
+
+        Returns:
+            Game: The new game.
+        """
+        _, width, height, mineCount = DIFFICULTIES[difficulty]
+        return cls(width, height, mineCount, seed)
+
+    @property
+    def finished(self):
+        """
+        bool: Whether the game has been won or lost.
+        """
+        return self.state in (WON, LOST)
+
+    @property
+    def flagsRemaining(self):
+        """
+        int: The number of flags that can still be placed.
+        """
+        return self.board.mineCount - self.board.flagCount
+
+    def reveal(self, gridY, gridX):
+        """
+        Reveal a tile. The first reveal of the game generates the board around it, or
+        takes a layout for it from `layouts` if one is available.
+        Revealing a mine loses the game and reveals every mine, and revealing the
+        last safe tile wins it. Flagged and already revealed tiles are ignored.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+
+        Returns:
+            list: The flat indexes of the tiles that changed.
+        """
+        return self.apply([("reveal", gridY, gridX)])
+
+    def toggle_flag(self, gridY, gridX):
+        """
+        Place a flag on an unrevealed tile, or remove the flag if it already has one.
+        A flag is only placed if there are flags remaining.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+
+        Returns:
+            list: The flat indexes of the tiles that changed.
+        """
+        if self.finished:
+            return []
+
+        gameBoard = self.board
+        index = gameBoard.index(gridY, gridX)
+        flag = not gameBoard.flagCells[index]
+        if flag and self.flagsRemaining <= 0:
+            return []
+
+        return [index] if gameBoard.set_flag(gridY, gridX, flag) else []
+
+    def chord(self, gridY, gridX):
+        """
+        Reveal every unflagged neighbour of a revealed number once the number of flags
+        around it matches that number.
+
+        Args:
+            gridY (int): The y-coordinate of the revealed number.
+            gridX (int): The x-coordinate of the revealed number.
+
+        Returns:
+            list: The flat indexes of the tiles that changed.
+        """
+        return self.apply([("chord", gridY, gridX)])
+
+    def apply(self, actions):
+        """
+        Apply a batch of actions in one pass. Flags are toggled in order, while every
+        tile to be revealed by the reveals and chords is collected and revealed together
+        with a single flood fill, followed by a single check for a win or loss.
+
+        Args:
+            actions (list): (action, gridY, gridX) tuples, where the action is "reveal",
+                            "toggle_flag" or "chord".
+
+        Returns:
+            list: The flat indexes of the tiles that changed.
+
+        Raises:
+            ValueError: If an action is not recognised.
+        """
+        if self.finished:
+            return []
+
+        gameBoard = self.board
+        changed = []
+        targets = []
+        for action, gridY, gridX in actions:
+            index = gameBoard.index(gridY, gridX)
+            if action == "reveal":
+                if not gameBoard.flagCells[index] and not gameBoard.revealedCells[index]:
+                    targets.append(index)
+            elif action == "chord":
+                targets += self.chord_targets(index)
+            elif action == "toggle_flag":
+                changed += self.toggle_flag(gridY, gridX)
+            else:
+                raise ValueError("Unknown action: {}".format(action))
+
+        if not targets:
+            return changed
+
+        if not gameBoard.generated:
+            self.generate(*gameBoard.position(targets[0]))
+
+        return changed + self._check_result(gameBoard.reveal_many(targets))
+
+    def chord_targets(self, index):
+        """
+        Returns the tiles a chord on a tile would reveal.
+
+        Args:
+            index (int): The flat index of the tile.
+
+        Returns:
+            list: The flat indexes of the hidden, unflagged neighbours if the tile is a revealed
+                  number surrounded by as many flags as its number, otherwise an empty list.
+        """
+        gameBoard = self.board
+        count = gameBoard.countCells[index]
+        if not gameBoard.revealedCells[index] or gameBoard.mineCells[index] or count == 0:
+            return []
+
+        neighbours = gameBoard.neighbours(index)
+        if sum(gameBoard.flagCells[neighbour] for neighbour in neighbours) != count:
+            return []
+
+        return [neighbour for neighbour in neighbours
+                if not gameBoard.flagCells[neighbour] and not gameBoard.revealedCells[neighbour]]
+
+    def generate(self, gridY, gridX):
+        """
+        Place the mines for a first click, taking a layout from `layouts` if it has one
+        for the click, and otherwise generating the board.
+
+        Args:
+            gridY (int): The y-coordinate of the first click.
+            gridX (int): The x-coordinate of the first click.
+
+        Returns:
+            None
+        """
+        gameBoard = self.board
+        minePositions = None
+        if self.layouts is not None:
+            minePositions = self.layouts.take(gameBoard.width, gameBoard.height, gameBoard.mineCount, gridY, gridX)
+        if minePositions is None:
+            gameBoard.generate(gridY, gridX, self.seed)
+        else:
+            gameBoard.place_mines(minePositions)
+        self.firstClick = (gridY, gridX)
+        self.layout = minePositions
+        self.state = PLAYING
+
+    def _check_result(self, changed):
+        """
+        Update the game state after tiles have been revealed.
+
+        Args:
+            changed (list): The flat indexes of the tiles that were revealed.
+
+        Returns:
+            list: The flat indexes of the tiles that changed, including any mines revealed by a loss.
+        """
+        if self.board.exploded is not None:
+            self.state = LOST
+            changed += self.board.reveal_mines()
+        elif self.board.cleared:
+            self.state = WON
+        return changed
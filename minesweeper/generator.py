@@ -0,0 +1,299 @@
+"""
+Generation of boards that can be solved from the first click without guessing.
+Each candidate board is certified by playing it with the deterministic Solver,
+which is too slow to do while the player waits, so certified boards are made in
+a background pool of worker processes and kept in a pool for each board size
+until a game needs one.
+
+Running this module measures how quickly certified boards are generated:
+    python minesweeper/generator.py --boards 50 --size 24x20x99
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import solver
+
+
+def certify(width, height, mineCount, gridY, gridX, seed):
+    """
+    Generate a board for a first click and check that the Solver can clear it from
+    that click without guessing.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines on the board.
+        gridY (int): The y-coordinate of the first click.
+        gridX (int): The x-coordinate of the first click.
+        seed (int): The seed used to generate the board.
+
+    Returns:
+        tuple or None: The mine positions and the set of first click indexes the board is
+                       certified for, or None if the board needs a guess.
+    """
+    game = engine.Game(width, height, mineCount, seed)
+    opening = game.reveal(gridY, gridX)
+    boardSolver = solver.Solver(game.board)
+
+    while not game.finished:
+        index = boardSolver.next_safe()
+        if index is None:
+            return None
+        boardSolver.update(game.reveal(*divmod(index, width)))
+
+    if game.state != engine.WON:
+        return None
+
+    # Clicking any empty tile in the first opening reveals exactly the same opening
+    countCells = game.board.countCells
+    firstClicks = {index for index in opening if countCells[index] == 0}
+    return game.board.minePositions, firstClicks
+
+
+def find_board(width, height, mineCount, gridY, gridX, seed, maxAttempts=1000):
+    """
+    Try successive seeds until a board is certified solvable from a first click.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines on the board.
+        gridY (int): The y-coordinate of the first click.
+        gridX (int): The x-coordinate of the first click.
+        seed (int): The first seed to try.
+        maxAttempts (int): The number of boards to try before giving up.
+
+    Returns:
+        tuple: The mine positions and first click indexes of the board, or None if no
+               board was certified, followed by the number of boards tried.
+    """
+    for attempt in range(maxAttempts):
+        result = certify(width, height, mineCount, gridY, gridX, seed + attempt)
+        if result is not None:
+            return result, attempt + 1
+    return None, maxAttempts
+
+
+def transforms(width, height):
+    """
+    Returns the reflections of a board that keep its dimensions. A certified board
+    stays certified when reflected, along with its first clicks, so each board in the
+    pool can serve first clicks in four places.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+
+    Returns:
+        list: Functions mapping a flat index to its reflected index. Each is its own inverse.
+    """
+    def identity(index):
+        return index
+
+    def flip_x(index):
+        gridY, gridX = divmod(index, width)
+        return gridY * width + (width - 1 - gridX)
+
+    def flip_y(index):
+        gridY, gridX = divmod(index, width)
+        return (height - 1 - gridY) * width + gridX
+
+    def flip_both(index):
+        return flip_x(flip_y(index))
+
+    return [identity, flip_x, flip_y, flip_both]
+
+
+class BoardPool:
+    """
+    A class that keeps a pool of certified no-guess boards for each board size, and
+    refills it in the background with a pool of worker processes.
+
+    The first clicks requested are spread over a grid of regions across each board,
+    and with the reflections of each board this covers most first clicks. A first
+    click that no pooled board covers is a miss, and the game falls back to a normal
+    board rather than waiting for one to be certified.
+
+    Attributes:
+        sizes (list): The (width, height, mineCount) board sizes to keep boards for.
+        target (int): The number of boards to keep for each size.
+        regions (int): The number of regions along each side of the board.
+        stats (dict): Counts of hits, misses, boards certified and boards tried.
+    """
+
+    def __init__(self, sizes, target=24, workers=None, regions=3):
+        """
+        Initializes the BoardPool object.
+
+        Args:
+            sizes (list): The (width, height, mineCount) board sizes to keep boards for.
+            target (int): The number of boards to keep for each size.
+            workers (int or None): The number of worker processes, defaulting to the CPU count.
+            regions (int): The number of regions along each side of the board.
+
+        Returns:
+            None
+        """
+        self.sizes = [tuple(size) for size in sizes]
+        self.target = target
+        self.workers = workers
+        self.regions = regions
+        self.stats = {"hits": 0, "misses": 0, "certified": 0, "attempts": 0}
+        self._boards = {size: [] for size in self.sizes}
+        self._pending = {size: 0 for size in self.sizes}
+        self._nextRegion = {size: 0 for size in self.sizes}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._rng = random.Random()
+
+    def start(self):
+        """
+        Start the worker processes and begin filling the pool for every board size.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for size in self.sizes:
+            self._refill(size)
+
+    def close(self):
+        """
+        Stop the worker processes, abandoning any boards still being certified.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def available(self, width, height, mineCount):
+        """
+        Returns the number of certified boards waiting in the pool for a board size.
+        """
+        with self._lock:
+            return len(self._boards.get((width, height, mineCount), []))
+
+    def take(self, width, height, mineCount, gridY, gridX):
+        """
+        Remove a certified board for a first click from the pool, reflecting it if needed.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines on the board.
+            gridY (int): The y-coordinate of the first click.
+            gridX (int): The x-coordinate of the first click.
+
+        Returns:
+            list or None: The mine positions, or None if no pooled board covers the first click.
+        """
+        size = (width, height, mineCount)
+        index = gridY * width + gridX
+        minePositions = None
+
+        with self._lock:
+            for number, (mines, firstClicks) in enumerate(self._boards.get(size, [])):
+                for transform in transforms(width, height):
+                    if transform(index) in firstClicks:
+                        minePositions = [transform(mine) for mine in mines]
+                        del self._boards[size][number]
+                        break
+                if minePositions is not None:
+                    break
+            self.stats["hits" if minePositions is not None else "misses"] += 1
+
+        if size in self._boards:
+            self._refill(size)
+        return minePositions
+
+    def _refill(self, size):
+        """
+        Submit certification jobs until the pool for a size will reach its target.
+        Each job asks for a first click in the next region of the board.
+        """
+        if self._executor is None:
+            return
+
+        width, height, mineCount = size
+        with self._lock:
+            needed = self.target - len(self._boards[size]) - self._pending[size]
+            jobs = []
+            for _ in range(max(0, needed)):
+                region = self._nextRegion[size]
+                self._nextRegion[size] = (region + 1) % (self.regions * self.regions)
+                regionY, regionX = divmod(region, self.regions)
+                gridY = (2 * regionY + 1) * height // (2 * self.regions)
+                gridX = (2 * regionX + 1) * width // (2 * self.regions)
+                jobs.append((gridY, gridX, self._rng.randrange(1, 2 ** 31)))
+            self._pending[size] += len(jobs)
+
+        for gridY, gridX, seed in jobs:
+            future = self._executor.submit(find_board, width, height, mineCount, gridY, gridX, seed)
+            future.add_done_callback(lambda future, size=size: self._finished(size, future))
+
+    def _finished(self, size, future):
+        """
+        Add a board certified by a worker to the pool, and submit another job if the
+        worker failed to find one.
+        """
+        with self._lock:
+            self._pending[size] -= 1
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        board, attempts = future.result()
+        with self._lock:
+            self.stats["attempts"] += attempts
+            if board is not None:
+                self.stats["certified"] += 1
+                self._boards[size].append(board)
+        if board is None:
+            self._refill(size)
+
+
+def main():
+    import simulate
+
+    parser = argparse.ArgumentParser(description="Measure the generation of no-guess Minesweeper boards.")
+    parser.add_argument("--boards", type=int, default=50, help="certified boards to generate for each size")
+    parser.add_argument("--size", type=simulate.parse_size, action="append", default=[],
+                        help="a board size as WIDTHxHEIGHTxMINES, can be repeated (default: 24x20x99)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print("{:<14} {:>7} {:>10} {:>10} {:>12} {:>10}".format(
+        "board", "boards", "boards/s", "tried", "certified %", "coverage %"))
+    for name, width, height, mineCount in args.size or [simulate.parse_size("24x20x99")]:
+        pool = BoardPool([(width, height, mineCount)], target=args.boards, workers=args.workers)
+        start = time.perf_counter()
+        pool.start()
+        while pool.available(width, height, mineCount) < args.boards:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        pool.close()
+
+        covered = set()
+        for _, firstClicks in pool._boards[(width, height, mineCount)]:
+            for transform in transforms(width, height):
+                covered.update(transform(index) for index in firstClicks)
+
+        print("{:<14} {:>7} {:>10.1f} {:>10} {:>12.2f} {:>10.2f}".format(
+            name, args.boards, args.boards / elapsed, pool.stats["attempts"],
+            100 * pool.stats["certified"] / pool.stats["attempts"], 100 * len(covered) / (width * height)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
 import os
 import random
+import time
+
+# When this module started loading, which is where the startup report begins
+IMPORT_START = time.perf_counter()
+
 import pygame as pg
 import pygame_menu as pgm
 from config import *
 import database
+import perf
+import animation
+import chunks
+import engine
+import generator
+import replay
+import viewport
 
 # If PyGame cannot be imported, install using the following PIP commands:
 
 # > py -m pip install -U pygame --user
 # > py -m pip install -U pygame_menu --user
 
-# Clear the terminal for debugging purposes
-os.system("cls")
-
-# Initialize pygame and set window parameters
-pg.init()
-screen = pg.display.set_mode((RESOLUTION, RESOLUTION))
+# The window, fonts, menu images and database are created by `initialise` when the first
+# MinesweeperApp is made, so that tools can import this module without opening a window
+screen = None
 
 # Fonts used by numbers such as the timer and flag counter
-numberFont = pg.font.Font(NUMBER_FONT, 35)
+numberFont = None
+
+# Rendered characters of numberFont, used to build the timer and flag counter text
+numberGlyphs = {}
 
 # List of possible mine colors once revealed
 mineColours = [MINE_BLUE, MINE_CYAN, MINE_MAGENTA, MINE_ORANGE, MINE_PURPLE, MINE_RED, MINE_YELLOW]
@@ -26,28 +38,127 @@ mineColours = [MINE_BLUE, MINE_CYAN, MINE_MAGENTA, MINE_ORANGE, MINE_PURPLE, MIN
 # Directories of number images to use on the board
 numbers = [NUMBER_1, NUMBER_2, NUMBER_3, NUMBER_4]
 
-# Create Pygame-Menu base images for menu interfaces
-settingsMenuImage = pgm.baseimage.BaseImage(image_path=SETTINGS_MENU, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
-leaderboardMenuImage = pgm.baseimage.BaseImage(image_path=LEADERBOARD_MENU, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
-promptImage = pgm.baseimage.BaseImage(image_path=PROMPT, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
+# Pygame-Menu base images for menu interfaces
+settingsMenuImage = None
+leaderboardMenuImage = None
+promptImage = None
 
 # Constants
-TILE_SIZE = None  # Tile size will be set based on difficulty
+TILE_SIZE = None  # Tile size will be set based on difficulty and the camera's zoom
 USER_ID = 1  # Default user when the game first starts
+boardPool = None  # Pool of no-guess boards, started when NO_GUESS_BOARDS is enabled
+
+# Icon images loaded from disk, and the same icons pre-scaled to the current TILE_SIZE
+iconImages = {}
+tileSprites = {}
+
+# Checkerboards of the covered (False) and revealed (True) tile colours at the current TILE_SIZE
+checkerLayers = {}
+
+# Database of users and scores
+db = None
+
+# The time taken by each phase of starting the game
+startup = perf.StartupTimer(IMPORT_START)
+startup.add("imports", time.perf_counter() - IMPORT_START)
+
+def initialise():
+    """
+    Open the window and load the fonts, menu images and database, skipping any that
+    are already set up. Each is timed as a phase of the startup report.
+    """
+    global screen, numberFont, settingsMenuImage, leaderboardMenuImage, promptImage, db
+    if screen is None:
+        with startup.phase("display"):
+            pg.init()
+            screen = pg.display.set_mode((RESOLUTION, RESOLUTION))
+
+    if numberFont is None:
+        with startup.phase("fonts"):
+            numberFont = pg.font.Font(NUMBER_FONT, 35)
+
+    if promptImage is None:
+        with startup.phase("menu images"):
+            settingsMenuImage = pgm.baseimage.BaseImage(image_path=SETTINGS_MENU, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
+            leaderboardMenuImage = pgm.baseimage.BaseImage(image_path=LEADERBOARD_MENU, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
+            promptImage = pgm.baseimage.BaseImage(image_path=PROMPT, drawing_mode=pgm.baseimage.IMAGE_MODE_SIMPLE)
+
+    if db is None:
+        with startup.phase("database"):
+            db = database.Database("data/database.sqlite")
+            db.create_tables()
+            db.create_user("Guest")
+
+def load_icon(path):
+    """
+    Load an icon from disk, caching it so each file is only decoded once.
+    Args:
+        path (str): The directory of the icon image.
+    Returns:
+        pygame.Surface: The unscaled icon.
+    """
+    if path not in iconImages:
+        iconImages[path] = pg.image.load(path).convert_alpha()
+    return iconImages[path]
 
-# Database initialization
-db = database.Database("data/database.sqlite")
-db.create_tables()
-db.create_user("Guest")
+def build_tile_sprites(tileSize):
+    """
+    Pre-scale every tile icon (flag, mine colours and numbers) to the tile size,
+    and pre-render the covered and revealed checkerboards, so that Tile.draw can
+    blit ready-made surfaces.
+
+    The checkerboard repeats every two tiles, so each layer is two tiles square,
+    whatever the size of the board, and a tile copies the square of the layer
+    that matches the parity of its position.
+    Args:
+        tileSize (int): The size of each tile.
+    """
+    tileSprites.clear()
+    for path in [FLAG_ICON] + mineColours:
+        tileSprites[path] = pg.transform.smoothscale(load_icon(path), (tileSize, tileSize))
+    for path in numbers:
+        tileSprites[path] = pg.transform.scale(load_icon(path), (tileSize, tileSize))
+
+    for revealed, (even, odd) in ((False, (TILE_GREEN1, TILE_GREEN2)), (True, (TILE_BROWN2, TILE_BROWN1))):
+        layer = pg.Surface((2 * tileSize, 2 * tileSize))
+        layer.fill(even)
+        layer.fill(odd, (tileSize, 0, tileSize, tileSize))
+        layer.fill(odd, (0, tileSize, tileSize, tileSize))
+        checkerLayers[revealed] = layer
+
+def render_number(text):
+    """
+    Build a surface for the given number text from cached numberFont glyphs,
+    so each character is only rendered by the font once.
+    Args:
+        text (str): The number text to render.
+    Returns:
+        pygame.Surface: The rendered text.
+    """
+    glyphs = []
+    for char in text:
+        if char not in numberGlyphs:
+            numberGlyphs[char] = numberFont.render(char, True, COLOUR_WHITE)
+        glyphs.append(numberGlyphs[char])
+
+    surface = pg.Surface((sum(glyph.get_width() for glyph in glyphs), numberFont.get_height()), pg.SRCALPHA)
+    x = 0
+    for glyph in glyphs:
+        surface.blit(glyph, (x, 0))
+        x += glyph.get_width()
+    return surface
 
 def tilesize_set_constant(tileSize):
     """
-    Set the global TILE_SIZE based on the chosen difficulty.
+    Set the global TILE_SIZE based on the chosen difficulty, rebuilding the
+    tile sprites only if the size has actually changed.
     Args:
         tileSize (int): The size of each tile.
     """
     global TILE_SIZE
-    TILE_SIZE = tileSize 
+    if tileSize != TILE_SIZE:
+        TILE_SIZE = tileSize
+        build_tile_sprites(tileSize)
 
 def user_set_constant(username):
     """
@@ -60,71 +171,70 @@ def user_set_constant(username):
 
 class Tile(pg.sprite.DirtySprite):
     """
-    This class creates an object for each tile on the board, and provides
-    each tile with different attributes for use in further calculations
-    and operations.
+    This class creates an object for each tile on the board, which is a view
+    of that tile's state in the Board model. It only holds what is needed to
+    draw the tile, such as its grid position and mine colour. Tiles are created
+    the first time they are drawn, and are drawn wherever the camera places them.
     It is inhertied from the sprite class in pygame so it can be drawn
     and updated using pygame functions.
     """
-    def __init__(self, gridY, gridX):
+    def __init__(self, gameBoard, gridY, gridX):
         """
         Initialize a tile with its attributes.
         Args:
+            gameBoard (board.Board): The board holding the state of the tile.
             gridY (int): The y-coordinate on the grid.
             gridX (int): The x-coordinate on the grid.
         """
         super().__init__()
+        self.board = gameBoard
         self.gridY = gridY
         self.gridX = gridX
-        self.clicked = False
-        self.mine = False
-        self.flag = False
-        self.update = True
+        self.index = gameBoard.index(gridY, gridX)
         self.mineColour = random.choice(mineColours)
-        self.count = 0
-        self.pixelPosition = (gridX * TILE_SIZE, (gridY * TILE_SIZE) + 100)
         
-    def draw(self):
+    def draw(self, pixelPosition, hidden=False):
         """
         Draw the tile on the screen based on its attributes.
 
         This method updates and draws the tile based on its current state,
         including whether it's flagged, clicked, contains a mine, or shows
-        a number. The drawing is optimized to avoid unnecessary operations.
+        a number. The drawing is optimized to avoid unnecessary operations:
+        the tile's background is copied from a pre-rendered checkerboard
+        rather than filled into a new surface.
+
+        Args:
+            pixelPosition (tuple): The (x, y) screen position of the tile's top left corner.
+            hidden (bool): Draw a revealed tile as if it were still covered, while it waits
+                           for its reveal animation.
 
         Returns:
-            None
+            pygame.Rect: The area of the screen that was drawn over.
         """
-        if self.flag:
-            flag_img = pg.image.load(FLAG_ICON)
-            self.image = pg.transform.smoothscale(flag_img, (TILE_SIZE, TILE_SIZE))
-        elif self.clicked and self.mine and not self.flag:
-            mine_img = pg.image.load(self.mineColour)
-            self.image = pg.transform.smoothscale(mine_img, (TILE_SIZE, TILE_SIZE))
+        flag = self.board.flagCells[self.index]
+        clicked = self.board.revealedCells[self.index] and not hidden
+        mine = self.board.mineCells[self.index]
+        count = self.board.countCells[self.index]
+
+        self.rect = pg.Rect(pixelPosition, (TILE_SIZE, TILE_SIZE))
+        if clicked and mine and not flag:
+            self.image = tileSprites[self.mineColour]
+            screen.blit(self.image, pixelPosition)
         else:
-            if self.clicked:
-                if (self.gridY % 2 == 0) ^ (self.gridX % 2 == 0):
-                    colour = TILE_BROWN1
-                else:
-                    colour = TILE_BROWN2
-            else:
-                if (self.gridY % 2 == 0) ^ (self.gridX % 2 == 0):
-                    colour = TILE_GREEN2
-                else:
-                    colour = TILE_GREEN1
+            # The flag icon is transparent, so it is drawn over the covered tile's colour
+            self.image = checkerLayers[bool(clicked) and not flag]
+            screen.blit(self.image, pixelPosition,
+                        ((self.gridX % 2) * TILE_SIZE, (self.gridY % 2) * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+            if flag:
+                self.image = tileSprites[FLAG_ICON]
+                screen.blit(self.image, pixelPosition)
 
-            self.image = pg.Surface((TILE_SIZE, TILE_SIZE))
-            self.image.fill(colour)
+        if not mine and not flag and clicked and count > 0:
+            index = count - 1 if 1 <= count <= 4 else 0
+            self.image = tileSprites[numbers[index]]
+            screen.blit(self.image, pixelPosition)
 
-        self.image.get_rect(topleft=self.pixelPosition)
-        screen.blit(self.image, self.pixelPosition)
-
-        if not self.mine and not self.flag and self.clicked and self.count > 0:
-            index = self.count - 1 if 1 <= self.count <= 4 else 0
-            num_img = pg.image.load(numbers[index])
-            self.image = pg.transform.scale(num_img, (TILE_SIZE, TILE_SIZE))
-            self.image.get_rect(topleft=self.pixelPosition)
-            screen.blit(self.image, self.pixelPosition)
+        return self.rect
 
 
 class MinesweeperApp(object):
@@ -137,30 +247,33 @@ class MinesweeperApp(object):
 
     def __init__(self):
         """
-        This is run at the start of the game; or whenever a main setting has been changed,
-        such as the user that is logged in. The game then initiates with any new settings.
+        This is run once at the start of the game. The window and database are set up by
+        `initialise` if this is the first app. The menus are built here, and are then
+        updated in place whenever a setting changes, such as the user that is logged in.
         """
+        initialise()
         self._seed = 17
         self._gamestart = False
         self._playing = True
         self._finished = False
         self._timer = 0
         self._difficultyNum = 1
-        self.leaderboard = db.get_leaderboard()
-        self.difficulty_select(None, self._difficultyNum)
-        self.setup_menus()
-        self.setup_grid()
-        self._unknownTileCount=self._gridWidth*self._gridHeight
-        
+        self._endless = False
+        self.leaderboard = None
+        self._hudWidth = None
+        self._board = None
+        self._tiles = {}
+        self._reveals = animation.RevealScheduler()
+        with startup.phase("menus"):
+            self.setup_menus()
+        with startup.phase("first game"):
+            self.difficulty_select(None, self._difficultyNum)
+
 
     def difficulty_select(self, item: tuple, value: int):
         """
         Re-initializes the game with new difficulty settings.
 
-        This method updates main attribute constants when the difficulty is changed,
-        such as grid size, mine count, tile size, and others. It also resets game
-        attributes and reconfigures the interface accordingly.
-
         Args:
             item (tuple): An unused tuple from the text-input.
             value (int): The value representing the selected difficulty:
@@ -171,25 +284,85 @@ class MinesweeperApp(object):
         Returns:
             None
         """
-        difficulties = [
-            ("EASY", 10, 8, 10, RESOLUTION // 10),
-            ("MEDIUM", 18, 14, 40, RESOLUTION // 18),
-            ("HARD", 24, 20, 99, RESOLUTION // 24)
-        ]
+        self._difficultyName, self._gridWidth, self._gridHeight, self._mineCount = DIFFICULTIES[value]
+        self._difficultyNum = value
+        self._endless = False
+        self.new_game()
+
+
+    def custom_select(self, width: int, height: int, mineCount: int):
+        """
+        Re-initializes the game with a custom board size, which can be far larger than
+        the window. Custom games are not saved to the leaderboard.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines on the board.
+
+        Returns:
+            None
+        """
+        self._difficultyName, self._gridWidth, self._gridHeight, self._mineCount = "CUSTOM", width, height, mineCount
+        self._difficultyNum = None
+        self._endless = False
+        self.new_game()
+
+
+    def endless_select(self):
+        """
+        Re-initializes the game with an endless board, which is generated in chunks as it
+        is explored. The flag counter shows the number of flags placed, and endless games
+        are neither saved to the leaderboard nor recorded as replays.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._difficultyName, self._gridWidth, self._gridHeight, self._mineCount = "ENDLESS", None, None, 0
+        self._difficultyNum = None
+        self._endless = True
+        self.new_game()
+
+
+    def new_game(self):
+        """
+        Start a new game with the current board settings.
+
+        This method resets the game attributes and the camera, which starts with the
+        tiles filling the width of the window, or at MIN_TILE_SIZE if the board is too
+        large for that, or at ENDLESS_TILE_SIZE for an endless board. It also updates the
+        menus in place, only rebuilding the HUD and the grid's tiles when the dimensions
+        of the grid have changed.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        view = (0, TAB_SIZE, RESOLUTION, RESOLUTION - TAB_SIZE)
+        if self._endless:
+            self._camera = viewport.Camera(None, None, view, ENDLESS_TILE_SIZE, MIN_TILE_SIZE, MAX_TILE_SIZE)
+        else:
+            fitSize = RESOLUTION // self._gridWidth
+            self._camera = viewport.Camera(self._gridWidth, self._gridHeight, view,
+                                           fitSize, max(fitSize, MIN_TILE_SIZE), max(fitSize, MAX_TILE_SIZE))
+        tilesize_set_constant(self._camera.tileSize)
 
-        self._difficultyName, self._gridWidth, self._gridHeight, self._mineCount, self._tileSize = difficulties[value]
-        
-        tilesize_set_constant(self._tileSize)
-        self._unknownTileCount = self._gridWidth * self._gridHeight
         self._gamestart = False
         self._playing = True
         self._finished = False
         self._timer = 0
         self._flagCount = self._mineCount
-        self._difficultyNum = value
-        self.leaderboard = db.get_leaderboard()
         screen.fill(COLOUR_BORDER)
-        self.setup_menus()
+        self._fullRedraw = True
+        self._redrawGui = True
+        self.refresh_menus()
+        if self._hudWidth != self._gridWidth:
+            self.setup_hud()
         self.setup_grid()
 
 
@@ -198,8 +371,8 @@ class MinesweeperApp(object):
         Exits the current menu without making any changes.
 
         This method allows the user to exit a menu without applying any changes to
-        the game settings. It calls the `difficulty_select` method with the current
-        difficulty value to ensure no modifications are made.
+        the game settings. It calls the `new_game` method with the current board
+        settings to ensure no modifications are made.
 
         Args:
             None
@@ -207,15 +380,16 @@ class MinesweeperApp(object):
         Returns:
             None
         """
-        self.difficulty_select(None, self._difficultyNum)
+        self.new_game()
 
 
     def check_name_test(self, value: str):
         """
-        Update the current user's global value and reinitialize the game.
+        Update the current user's global value and start a new game.
 
         This method takes a new user name as input, updates the global value of the
-        current user, and then reinitializes the game with the new user settings.
+        current user and the username shown in the settings menu, and then starts a
+        new game at the current difficulty.
 
         Args:
             value (str): The new user name.
@@ -224,7 +398,9 @@ class MinesweeperApp(object):
             None
         """
         user_set_constant(value)
-        self.__init__()
+        self._usernameLabel.set_title(value)
+        self._usernameInput.clear()
+        self.new_game()
 
 
     def setup_menus(self):
@@ -235,6 +411,10 @@ class MinesweeperApp(object):
         settings menu, leaderboard menu, and prompts. It also adds buttons and other
         interactable elements to the menus and assigns their related functions.
 
+        The menus are only built once, when the application starts. The widgets that
+        change between games are kept so that `refresh_menus` and `prompt` can update
+        them in place.
+
         Args:
             None
 
@@ -381,7 +561,7 @@ class MinesweeperApp(object):
         )
         btn.translate(-286,-238)
 
-        btn = self._settings.add.dropselect(
+        self._difficultySelect = self._settings.add.dropselect(
             title="",
             items=[("Easy", 0),
                    ("Medium", 1),
@@ -401,7 +581,7 @@ class MinesweeperApp(object):
             shadow_width=20
         )
 
-        btn = self._settings.add.text_input(
+        self._usernameInput = self._settings.add.text_input(
             "    ",
             default="",
             onreturn=self.check_name_test,
@@ -416,14 +596,14 @@ class MinesweeperApp(object):
             selection_effect=pgm.widgets.NoneSelection(),
             text_ellipsis="..."
         )
-        btn.translate(0,15)
+        self._usernameInput.translate(0,15)
 
-        btn = self._settings.add.label(
+        self._usernameLabel = self._settings.add.label(
             db.get_user(USER_ID)[1], 
             font_name=TEXT_FONT, 
             font_size=15
         )
-        btn.translate(0,-110)
+        self._usernameLabel.translate(0,-110)
         
         btn = self._menu.add.button(
             "   ",
@@ -462,97 +642,100 @@ class MinesweeperApp(object):
         )
 
 
-        try:
-            easy_place1score = ("  " + "{:03d}".format(self.leaderboard[0][0][1])) + "  "
-            easy_place1name = "  " + db.get_user(self.leaderboard[0][0][0])[1].ljust(40) 
-        except IndexError:
-            easy_place1score = ""
-            easy_place1name = ""
-        try:
-            easy_place2score = "  " + "{:03d}".format(self.leaderboard[0][1][1]) + "  "
-            easy_place2name = "  " + db.get_user(self.leaderboard[0][1][0])[1].ljust(40) 
-        except IndexError:
-            easy_place2score = ""
-            easy_place2name = ""
-        try:
-            easy_place3score = "  " + "{:03d}".format(self.leaderboard[0][2][1]) + "  " 
-            easy_place3name = "  " + db.get_user(self.leaderboard[0][2][0])[1].ljust(40) 
-        except IndexError:
-            easy_place3score = ""
-            easy_place3name = ""
-
-        easy_table = self._leaderboard.add.table(font_size=20, float=True)
-        easy_table.default_cell_padding = 7
-        easy_table.default_cell_align = pgm.locals.ALIGN_LEFT
-        easy_table.default_row_background_color = (0,0,0,0)
-        easy_table.add_row([easy_place1score, easy_place1name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        easy_table.add_row([easy_place2score, easy_place2name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        easy_table.add_row([easy_place3score, easy_place3name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        easy_table.translate(8,-157)
+        # The leaderboard tables start empty, and their cells are filled by `fill_leaderboard`
+        self._leaderboardTables = []
+        for tableY in (-157, -17, 123):
+            table = self._leaderboard.add.table(font_size=20, float=True)
+            table.default_cell_padding = 7
+            table.default_cell_align = pgm.locals.ALIGN_LEFT
+            table.default_row_background_color = (0,0,0,0)
+            for _ in range(LEADERBOARD_SIZE):
+                table.add_row(["", ""], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
+            table.translate(8, tableY)
+            self._leaderboardTables.append(table)
+
+        # The score labels of the prompt are given their values by `prompt`
+        self._scoreLabel = self._prompt.add.label(
+            "",
+            max_char=-1,
+            font_name=pgm.font.FONT_FIRACODE_BOLD,
+            font_size=22,
+            font_color=COLOUR_WHITE,
+            align=pgm.locals.ALIGN_LEFT
+        )
+        self._scoreLabel.translate(69, 28)
 
-        try:
-            medium_place1score = "  " + "{:03d}".format(self.leaderboard[1][0][1]) + "  " 
-            medium_place1name = "  " + db.get_user(self.leaderboard[1][0][0])[1].ljust(40) 
-        except IndexError:
-            medium_place1score = ""
-            medium_place1name = ""
-        try:
-            medium_place2score = "  " + "{:03d}".format(self.leaderboard[1][1][1]) + "  " 
-            medium_place2name = "  " + db.get_user(self.leaderboard[1][1][0])[1].ljust(40) 
-        except IndexError:
-            medium_place2score = ""
-            medium_place2name = ""
-        try:
-            medium_place3score = "  " + "{:03d}".format(self.leaderboard[1][2][1]) + "  " 
-            medium_place3name = "  " + db.get_user(self.leaderboard[1][2][0])[1].ljust(40) 
-        except IndexError:
-            medium_place3score = ""
-            medium_place3name = ""
-
-        medium_table = self._leaderboard.add.table(font_size=20, float=True)
-        medium_table.default_cell_padding = 7
-        medium_table.default_cell_align = pgm.locals.ALIGN_LEFT
-        medium_table.default_row_background_color = (0,0,0,0)
-        medium_table.add_row([medium_place1score, medium_place1name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        medium_table.add_row([medium_place2score, medium_place2name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        medium_table.add_row([medium_place3score, medium_place3name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        medium_table.translate(8,-17)
+        self._highscoreLabel = self._prompt.add.label(
+            "",
+            max_char=-1,
+            font_name=pgm.font.FONT_FIRACODE_BOLD,
+            font_size=22,
+            font_color=COLOUR_WHITE,
+            align=pgm.locals.ALIGN_RIGHT
+        )
+        self._highscoreLabel.translate(-69, 28)
 
-        try:
-            hard_place1score = "  " + "{:03d}".format(self.leaderboard[2][0][1]) + "  "
-            hard_place1name = "  " + db.get_user(self.leaderboard[2][0][0])[1].ljust(40)
-        except IndexError:
-            hard_place1score = ""
-            hard_place1name = ""
-        try:
-            hard_place2score = "  " + "{:03d}".format(self.leaderboard[2][1][1]) + "  "
-            hard_place2name = "  " + db.get_user(self.leaderboard[2][1][0])[1].ljust(40)
-        except IndexError:
-            hard_place2score = ""
-            hard_place2name = ""
-        try:
-            hard_place3score = "  " + "{:03d}".format(self.leaderboard[2][2][1]) + "  "
-            hard_place3name = "  " + db.get_user(self.leaderboard[2][2][0])[1].ljust(40)
-        except IndexError:
-            hard_place3score = ""
-            hard_place3name = ""
-
-        hard_table = self._leaderboard.add.table(font_size=20, float=True)
-        hard_table.default_cell_padding = 7
-        hard_table.default_cell_align = pgm.locals.ALIGN_LEFT
-        hard_table.default_row_background_color = (0,0,0,0)
-        hard_table.add_row([hard_place1score, hard_place1name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        hard_table.add_row([hard_place2score, hard_place2name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        hard_table.add_row([hard_place3score, hard_place3name], cell_font=TEXT_FONT_BOLD, cell_border_width=0)
-        hard_table.translate(8,123)
+
+    def refresh_menus(self):
+        """
+        Update the menus in place for a new game.
+
+        Any open submenu is closed and the difficulty selector shows the current
+        difficulty, unless the board is a custom size. The leaderboard comes from the
+        database's cache, so the tables are only refilled when a score has changed the
+        places since they were last filled.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self._menu.full_reset()
+        if self._difficultyNum is not None:
+            self._difficultySelect.set_value(self._difficultyNum)
+
+        leaderboard = db.get_leaderboard(LEADERBOARD_SIZE, len(DIFFICULTIES))
+        if leaderboard != self.leaderboard:
+            self.leaderboard = leaderboard
+            self.fill_leaderboard()
+
+
+    def fill_leaderboard(self):
+        """
+        Set the text of every cell in the leaderboard tables from `leaderboard`.
+
+        The leaderboard rows already include usernames, so each table is filled without
+        further queries.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for table, rows in zip(self._leaderboardTables, self.leaderboard):
+            for place in range(LEADERBOARD_SIZE):
+                if place < len(rows):
+                    username, score, _ = rows[place]
+                    cells = ["  " + "{:03d}".format(score) + "  ", "  " + username.ljust(40)]
+                else:
+                    cells = ["", ""]
+                for column, text in enumerate(cells, 1):
+                    table.get_cell(column, place + 1).set_title(text)
+                # Resize the row to fit its new text, keeping its cells without borders
+                table.update_cell_style(-1, place + 1, border_position=pgm.locals.POSITION_NORTH, border_width=0)
 
 
     def prompt(self, result: bool):
         """
         Display the user's current score and high score when the game is won or lost.
 
-        This function sets the game state to finished and displays the user's score and
-        high score in the prompt menu.
+        This function sets the game state to finished and sets the user's score and
+        high score in the prompt menu, which `present` shows once the reveal animations
+        have finished. A winning score is queued to be saved in the background, so the
+        prompt appears without waiting for the database. Custom board sizes have no
+        high score.
 
         Args:
             result (bool): True if the user has won, False if the user has lost
@@ -561,221 +744,471 @@ class MinesweeperApp(object):
             None
         """
         self._playing = False
+        best = None
+        if self._difficultyNum is not None:
+            best = db.get_highscore(self._difficultyNum, USER_ID)[0]
+            if result and db.queue_score(self._timer, self._difficultyNum, USER_ID):
+                best = min(best or self._timer, self._timer)
         score = "{:03d}".format(self._timer)
-        highscore = "{:03d}".format(db.get_highscore(self._difficultyNum, USER_ID)[0] or 0)
+        highscore = "{:03d}".format(best or 0)
 
-        self._finished = True
+        self._scoreLabel.set_title(score)
+        self._highscoreLabel.set_title(highscore)
 
-        scoreText = self._prompt.add.label(
-            score,
-            max_char=-1,
-            font_name=pgm.font.FONT_FIRACODE_BOLD,
-            font_size=22,
-            font_color=COLOUR_WHITE,
-            align=pgm.locals.ALIGN_LEFT
-        )
-        scoreText.translate(69, 28)
 
-        highscoreText = self._prompt.add.label(
-            highscore,
-            max_char=-1,
-            font_name=pgm.font.FONT_FIRACODE_BOLD,
-            font_size=22,
-            font_color=COLOUR_WHITE,
-            align=pgm.locals.ALIGN_RIGHT
-        )
-        highscoreText.translate(-69, 28)
+    def setup_hud(self):
+        """
+        Pre-render the static parts of the heads-up display.
 
+        The certificate, flag and clock icons are loaded and scaled once onto a
+        transparent surface the size of the tab, which the flag counter and timer
+        are then composed on top of whenever their values change.
 
-    def update_gui(self, events):
+        Args:
+            None
+
+        Returns:
+            None
         """
-        Update and draw the main interface excluding the grid, and handle non-pygame-menu images.
+        centre = min(TILE_SIZE * (self._gridWidth or RESOLUTION), RESOLUTION) // 2
 
-        This function updates and draws the main game interface, including elements like
-        flags, timers, and icons. It also handles drawing images that are not part of
-        the pygame-menu system.
+        self._hudBase = pg.Surface((RESOLUTION, TAB_SIZE), pg.SRCALPHA)
+        self._hudBase.blit(load_icon(CERTIFICATE_ICON), (620, 16))
+
+        flag_img = pg.transform.smoothscale(load_icon(FLAG_ICON), (50, 50))
+        self._hudBase.blit(flag_img, flag_img.get_rect(center=(centre - 120, TAB_SIZE // 2)))
+
+        clock_img = pg.transform.smoothscale(load_icon(CLOCK_ICON), (50, 50))
+        self._hudBase.blit(clock_img, clock_img.get_rect(center=(centre + 90, TAB_SIZE // 2)))
+
+        self._hudFlagPosition = (centre - 85, TAB_SIZE // 2)
+        self._hudTimerPosition = (centre + 120, TAB_SIZE // 2)
+        self._hudValues = None
+        self._hudSurface = None
+        self._hudWidth = self._gridWidth
+
+
+    def compose_hud(self):
+        """
+        Compose the flag counter and timer onto a copy of the static HUD surface.
 
         Args:
-            events (event): Pygame events such as user inputs and click coordinates
+            None
 
         Returns:
             None
         """
-        self._menu.update(events)
-        self._menu.draw(screen)
+        self._hudSurface = self._hudBase.copy()
 
-        if self._finished:
-            self._prompt.update(events)
-            self._prompt.draw(screen)
+        flag_count = render_number(str(self._flagCount).zfill(1))
+        self._hudSurface.blit(flag_count, flag_count.get_rect(midleft=self._hudFlagPosition))
+
+        timer_value = render_number(str(self._timer).zfill(3))
+        self._hudSurface.blit(timer_value, timer_value.get_rect(midleft=self._hudTimerPosition))
 
-        certificate_img = pg.image.load(CERTIFICATE_ICON)
-        screen.blit(certificate_img, (620, 16))
+        self._hudValues = (self._flagCount, self._timer)
+
+
+    def update_gui(self, events):
+        """
+        Update and draw the main interface excluding the grid, and handle non-pygame-menu images.
 
-        flag_img = pg.image.load(FLAG_ICON)
-        flag_img = pg.transform.smoothscale(flag_img, (50, 50))
-        flag_img_rect = flag_img.get_rect(center=((TILE_SIZE * self._gridWidth) // 2 - 120, TAB_SIZE // 2))
-        screen.blit(flag_img, flag_img_rect)
+        This function updates and draws the main game interface, including elements like
+        flags, timers, and icons. The menus are only redrawn when they have reacted to an
+        event, a submenu is open, or the HUD values have changed, and the HUD is only
+        recomposed when the flag count or timer has changed since it was last drawn.
 
-        flag_count = numberFont.render(str(self._flagCount).zfill(1), True, COLOUR_WHITE)
-        flag_count_rect = flag_count.get_rect(midleft=((TILE_SIZE * self._gridWidth) // 2 - 85, TAB_SIZE // 2))
-        screen.blit(flag_count, flag_count_rect)
+        Args:
+            events (event): Pygame events such as user inputs and click coordinates
 
-        clock_img = pg.image.load(CLOCK_ICON)
-        clock_img = pg.transform.smoothscale(clock_img, (50, 50))
-        clock_img_rect = clock_img.get_rect(center=((TILE_SIZE * self._gridWidth) // 2 + 90, TAB_SIZE // 2))
-        screen.blit(clock_img, clock_img_rect)
+        Returns:
+            list: The rects of the screen that were drawn over.
+        """
+        rects = []
+        hudChanged = self._hudValues != (self._flagCount, self._timer)
+        menuUpdated = self._menu.update(events)
+        current_menu = self._menu.get_current()
+        redraw = self._redrawGui or menuUpdated or hudChanged or current_menu is not self._menu
 
-        timer_value = numberFont.render(str(self._timer).zfill(3), True, COLOUR_WHITE)
-        timer_value_rect = timer_value.get_rect(midleft=((TILE_SIZE * self._gridWidth) // 2 + 120, TAB_SIZE // 2))
-        screen.blit(timer_value, timer_value_rect)
+        if redraw:
+            self._menu.draw(screen)
+            rects.append(current_menu.get_rect())
+
+        if self._finished:
+            if self._prompt.update(events) or redraw:
+                self._prompt.draw(screen)
+                rects.append(self._prompt.get_rect())
+
+        # Submenus do not cover the tab, so the HUD only needs drawing over a fresh home menu
+        if redraw and current_menu is self._menu:
+            if hudChanged:
+                self.compose_hud()
+            screen.blit(self._hudSurface, (0, 0))
+            rects.append(self._hudSurface.get_rect())
+
+        self._redrawGui = False
+        return rects
     
 
-    def setup_grid(self):
+    def setup_grid(self, game=None):
         """
         Initialize the game grid.
 
-        This function creates an empty matrix based on the size of the grid and initializes
-        Tile objects at each coordinate.
+        This function creates a new headless Game, whose board is generated on the first
+        reveal, or an EndlessGame whose chunks are generated as they are explored, with its
+        previous board's store of evicted chunks closed. The Tile objects that draw its
+        board are created by `tile` as they come into view, and kept by their board index.
+        When the grid keeps the same dimensions, the existing tiles are pointed at the new
+        board instead of being created again. A random game is given its own seed, so that
+        its replay can rebuild the board from the seed alone.
 
         Args:
-            None
+            game (engine.Game or None): A game to draw instead of a new one, such as a replay
 
         Returns:
             None
         """
-        self.grid = [[Tile(row, column) for column in range(self._gridWidth)] for row in range(self._gridHeight)]
+        if self._board is not None and isinstance(self._board, chunks.ChunkedBoard):
+            self._board.close()
+        self._reveals.clear()
+        if game is None:
+            seed = self._seed or random.randrange(1, 2 ** 32)
+            if self._endless:
+                game = chunks.EndlessGame(seed, CHUNK_SIZE, ENDLESS_MINE_DENSITY, CHUNK_CACHE_SIZE)
+            else:
+                game = engine.Game(self._gridWidth, self._gridHeight, self._mineCount, seed, boardPool)
+        self._game = game
+        self._recorder = replay.Recorder(self._game)
+        self._firstActionTicks = None
+        previous = self._board
+        self._board = self._game.board
+        if previous is not None and (previous.width, previous.height) == (self._board.width, self._board.height):
+            for tile in self._tiles.values():
+                tile.board = self._board
+        else:
+            self._tiles = {}
+        self._dirty = set()
+        self._gridRedraw = True
+
+
+    def tile(self, gridY, gridX):
+        """
+        Returns the Tile object of a grid coordinate, creating it if it has not been drawn before.
+
+        Args:
+            gridY (int): The y-coordinate on the grid.
+            gridX (int): The x-coordinate on the grid.
+
+        Returns:
+            Tile: The tile at the coordinate.
+        """
+        index = self._board.index(gridY, gridX)
+        tile = self._tiles.get(index)
+        if tile is None:
+            tile = self._tiles[index] = Tile(self._board, gridY, gridX)
+        return tile
 
 
     def draw_grid(self):
         """
-        Draw the grid, updating only changed tiles.
+        Draw the grid, updating only changed tiles that are in view.
 
-        This function handles the drawing of the grid. It iterates through the grid and 
-        draws only the tiles that have changed since the last drawing by checking the 
-        `update` attribute.
+        This function handles the drawing of the grid. Only the tiles inside the camera's
+        view are ever drawn, so the cost of a frame depends on the size of the window
+        rather than the board. Normally it draws only the visible tiles whose indexes have
+        been added to the `_dirty` set since the last drawing. After the camera has moved,
+        or when more tiles have changed than are visible, the whole view is redrawn.
+
+        Tiles waiting for their reveal animation are drawn covered. The tiles that have
+        fallen due are drawn one at a time until REVEAL_FRAME_BUDGET milliseconds have been
+        spent, and the rest stay waiting in the scheduler for the next frame, so a large
+        reveal never stalls a frame. A full redraw already draws every visible tile, so it
+        only releases the tiles that have fallen due within the budget.
 
         Args:
             None
 
         Returns:
-            None
+            list: The rects of the screen that were drawn.
+        """
+        camera = self._camera
+        firstY, lastY, firstX, lastX = camera.visible_range()
+        view = pg.Rect(camera.view)
+        pending = self._reveals.pending
+        screen.set_clip(view)
+
+        def draw_tile(index):
+            gridY, gridX = self._board.position(index)
+            if firstY <= gridY < lastY and firstX <= gridX < lastX:
+                rect = self.tile(gridY, gridX).draw(camera.grid_to_screen(gridY, gridX), index in pending)
+                rects.append(rect.clip(view))
+
+        rects = []
+        if self._gridRedraw or len(self._dirty) > (lastY - firstY) * (lastX - firstX):
+            if self._reveals.busy:
+                deadline = time.perf_counter() + REVEAL_FRAME_BUDGET / 1000
+                for index in self._reveals.due(pg.time.get_ticks()):
+                    if time.perf_counter() >= deadline:
+                        break
+
+            # Forget the tiles that have left the view, so an endless board keeps a bounded number
+            if len(self._tiles) > 4 * (lastY - firstY) * (lastX - firstX):
+                self._tiles.clear()
+            screen.fill(COLOUR_BORDER, view)
+            for gridY in range(firstY, lastY):
+                for gridX in range(firstX, lastX):
+                    tile = self.tile(gridY, gridX)
+                    tile.draw(camera.grid_to_screen(gridY, gridX), tile.index in pending)
+            rects = [view]
+        else:
+            for index in self._dirty:
+                draw_tile(index)
+
+            if self._reveals.busy:
+                deadline = time.perf_counter() + REVEAL_FRAME_BUDGET / 1000
+                for index in self._reveals.due(pg.time.get_ticks()):
+                    draw_tile(index)
+                    if time.perf_counter() >= deadline:
+                        break
+
+        screen.set_clip(None)
+        self._dirty.clear()
+        self._gridRedraw = False
+        return rects
+
+
+    def move_camera(self, moved):
+        """
+        Redraw the grid after the camera has been panned or zoomed, rescaling the tile
+        sprites if the tile size has changed.
+
+        Args:
+            moved (bool): Whether the camera moved, as returned by `Camera.pan` or `Camera.zoom`
+
+        Returns:
+            bool: The same value.
         """
-        for row in self.grid:
-            for tile in row:
-                if tile.update:
-                    tile.draw()
-                    tile.update = False
+        if moved:
+            tilesize_set_constant(self._camera.tileSize)
+            self._gridRedraw = True
+        return moved
 
-    def reveal_tiles(self, gridY, gridX):
+    def apply_actions(self, actions):
         """
-        This function allows for the 'cluster reveal' effect that causes a section of
-        tiles to be revealed at once when the user clicks on an empty collection of
-        tiles.
+        Apply a batch of grid actions through the game engine.
+
+        Every action from one frame of input is applied together, so the reveals and chords
+        share a single flood fill, a single set of tiles to redraw and a single check for a
+        win or loss. The engine generates the board on the first reveal, performs the
+        'cluster reveal' effect across empty tiles, and reveals every mine if a mine is hit.
+
+        Each batch is recorded with its time since the first action, and the replay is
+        saved once the game is won or lost, unless the board is endless.
 
         Args:
-            gridY (int): The y-axis coordinate for the location of the tile to reveal around
-            gridX (int): The x-axis coordinate for the location of the tile to reveal around
+            actions (list): (action, gridY, gridX) tuples, where the action is "reveal",
+                            "toggle_flag" or "chord"
 
         Return:
+            list: The flat indexes of the tiles that changed.
+        """
+        ticks = pg.time.get_ticks()
+        if self._firstActionTicks is None:
+            self._firstActionTicks = ticks
+
+        changed = self.apply_changes(self._recorder.apply(ticks - self._firstActionTicks, actions), actions[0][1:])
+        if self._game.finished and RECORD_REPLAYS and not self._endless:
+            self.save_replay()
+        return changed
+
+
+    def save_replay(self):
+        """
+        Save the replay of the current game to REPLAY_FOLDER, named by the time it was
+        saved to the millisecond, the difficulty and the result, then delete the oldest
+        replays beyond REPLAY_LIMIT. A name that is already taken gets a number added
+        rather than replacing the other replay. An error, such as a full disk or a
+        folder that cannot be written, is printed and the game carries on.
+
+        Args:
             None
+
+        Return:
+            str or None: The path of the saved replay, or None if it could not be saved.
+        """
+        now = time.time()
+        stamp = "{}_{:03d}".format(time.strftime("%Y%m%d_%H%M%S", time.localtime(now)), int(now * 1000) % 1000)
+        name = "{}_{}_{}".format(stamp, self._difficultyName.lower(), self._game.state)
+        recorded = self._recorder.replay()
+        try:
+            os.makedirs(REPLAY_FOLDER, exist_ok=True)
+            number = 1
+            path = os.path.join(REPLAY_FOLDER, name + ".msr")
+            while True:
+                try:
+                    recorded.save(path, overwrite=False)
+                    break
+                except FileExistsError:
+                    number += 1
+                    path = os.path.join(REPLAY_FOLDER, "{}_{}.msr".format(name, number))
+            replay.prune(REPLAY_FOLDER, REPLAY_LIMIT)
+        except OSError as err:
+            print("save_replay error:")
+            print(err)
+            return None
+        return path
+
+
+    def apply_changes(self, changed, origin=None):
         """
-        def is_valid(y, x):
-            return 0 <= y < len(self.grid) and 0 <= x < len(self.grid[0])
+        Update the interface after a game action.
 
-        tile = self.grid[gridY][gridX]
+        The changed tiles are scheduled to be redrawn, the flag counter is updated, and the
+        prompt is set if the action won or lost the game. On an endless board the flag
+        counter shows the number of flags placed.
 
-        if not tile.clicked:
-            self._unknownTileCount -= 1
+        While ANIMATE_REVEALS is enabled the changed tiles are shown ring by ring outwards
+        from the action, and if a mine was hit, the other mines are then shown one after
+        another outwards from it. The game itself has already been updated, so the
+        animation only changes when the tiles are drawn.
 
-        tile.flag = False
-        tile.clicked = True
-        tile.update = True
+        Args:
+            changed (list): The flat indexes of the tiles changed by the action
+            origin (tuple or None): The (gridY, gridX) of the action, or None to start
+                                    from the first changed tile
 
-        if tile.count == 0 and not tile.mine:
-            for j in range(-1, 2):
-                for i in range(-1, 2):
-                    if i == 0 and j == 0:
-                        continue  # Skip the current tile
-                    if is_valid(gridY + j, gridX + i):
-                        neighbor_tile = self.grid[gridY + j][gridX + i]
-                        if not neighbor_tile.clicked:
-                            self.reveal_tiles(gridY + j, gridX + i)
+        Return:
+            list: The same flat indexes.
+        """
+        if ANIMATE_REVEALS and changed:
+            self.schedule_reveals(changed, origin or self._board.position(changed[0]))
+        else:
+            self._dirty.update(changed)
+        self._flagCount = self._game.flagsRemaining if not self._endless else self._board.flagCount
 
-        elif tile.mine:
-            for y in range(self._gridHeight):
-                for x in range(self._gridWidth):
-                    if self.grid[y][x].mine:
-                        self.grid[y][x].clicked = True
-                        self.grid[y][x].update = True
+        if self._playing and self._game.finished:
+            self.prompt(self._game.state == engine.WON)
 
+        return changed
 
-    def generate_grid(self, gridY, gridX):
+
+    def schedule_reveals(self, changed, origin):
         """
-        Generate a random game board with mines and initial tile clicks based on game difficulty.
+        Schedule the reveal animation of the tiles changed by an action.
 
-        This function generates a random game board with mines placed in different locations.
-        The initial click coordinates are used to prevent mines from being placed where the
-        user first clicks, ensuring that the game starts fairly. Cluster checks are performed
-        to avoid placing more than four mines in any 3x3 grid in the matrix, making the game
-        mathematically solvable without the user having to guess.
-        
         Args:
+            changed (list): The flat indexes of the tiles changed by the action
+            origin (tuple): The (gridY, gridX) of the action
 
         Return:
             None
         """
+        board = self._board
+        mines = []
+        if self._game.state == engine.LOST:
+            mines = [index for index in changed if board.mineCells[index] and index != board.exploded]
+            if mines:
+                mineSet = set(mines)
+                changed = [index for index in changed if index not in mineSet]
+
+        now = pg.time.get_ticks()
+        waves = animation.cascade_waves(changed, origin, board.position,
+                                        CASCADE_MAX_DURATION // CASCADE_INTERVAL + 1)
+        self._reveals.schedule(waves, now, CASCADE_INTERVAL)
+        if mines:
+            start = now + len(waves) * CASCADE_INTERVAL
+            self._reveals.schedule(animation.mine_waves(mines, board.position(board.exploded), board.position,
+                                                        MINE_MAX_DURATION // MINE_INTERVAL + 1),
+                                   start, MINE_INTERVAL)
+
+
+    def present(self, events):
+        """
+        Draw the changed parts of the grid and interface, and push them to the display.
 
-        # This is for debugging purposes.
-        if self._seed != 0:
-            random.seed(self._seed)
-
-        def check_cluster_count(y, x):
-            count = 0
-            for j in range(max(-1, -y), min(2, len(self.grid) - y)):
-                for i in range(max(-1, -x), min(2, len(self.grid[0]) - x)):
-                    if self.grid[y + j][x + i].mine:
-                        count += 1
-            return count
+        Only the changed areas of the screen are pushed, and idle frames are not presented
+        at all. Once a game has ended and its reveal animations have finished, the
+        prompt is shown.
 
-        for j in range(max(-1, -gridY), min(2, len(self.grid) - gridY)):
-            for i in range(max(-1, -gridX), min(2, len(self.grid[0]) - gridX)):
-                self.grid[gridY + j][gridX + i].clicked = True
+        Args:
+            events (list): The pygame events of this frame
 
-        currentMineCount = 0
-        while currentMineCount < self._mineCount:
-            self.gridX = random.randint(0, self._gridWidth - 1)
-            self.gridY = random.randint(0, self._gridHeight - 1)
+        Return:
+            bool: True if anything was drawn, or a reveal animation is still running.
+        """
+        rects = self.draw_grid()
+        if not self._playing and not self._finished and not self._reveals.busy:
+            self._finished = True
+            self._redrawGui = True
+        rects += self.update_gui(events)
+        presented = self._fullRedraw or bool(rects)
+
+        if self._fullRedraw:
+            pg.display.flip()
+            self._fullRedraw = False
+        elif rects:
+            pg.display.update(rects)
 
-            if self.grid[self.gridY][self.gridX].clicked or self.grid[self.gridY][self.gridX].mine:
-                continue
+        return presented or self._reveals.busy
 
-            clusterCount = check_cluster_count(self.gridY, self.gridX)
 
-            if clusterCount > 3:
-                continue
+    def play_replay(self, recorded, speed=1.0):
+        """
+        Render a recorded game at its recorded pace, frame by frame.
 
-            self.grid[self.gridY][self.gridX].mine = True
-            for j in range(max(-1, -self.gridY), min(2, len(self.grid) - self.gridY)):
-                for i in range(max(-1, -self.gridX), min(2, len(self.grid[0]) - self.gridX)):
-                    if not (j == 0 and i == 0):
-                        neighbor_tile = self.grid[self.gridY + j][self.gridX + i]
-                        if not neighbor_tile.mine:
-                            neighbor_tile.count += 1
-            currentMineCount += 1
+        Each recorded batch of actions is applied in its own frame, once the time it was
+        recorded at has been reached, and the timer shows the time of the recorded game.
+        The final frame is held until the window is closed.
 
-        for j in range(max(-1, -gridY), min(2, len(self.grid) - gridY)):
-            for i in range(max(-1, -gridX), min(2, len(self.grid[0]) - gridX)):
-                self.grid[gridY + j][gridX + i].clicked = False
+        Args:
+            recorded (replay.Replay): The replay to play
+            speed (float): How many times faster than real time to play
 
-        for y in range(self._gridHeight):
-            for x in range(self._gridWidth):
-                self.grid[y][x].update = True
+        Returns:
+            None
+        """
+        sizes = [tuple(size) for _, *size in DIFFICULTIES]
+        size = (recorded.width, recorded.height, recorded.mineCount)
+        if size in sizes:
+            self.difficulty_select(None, sizes.index(size))
+        else:
+            self.custom_select(*size)
+        self.setup_grid(recorded.new_game())
+        clock = pg.time.Clock()
+        start = pg.time.get_ticks()
+
+        for batchTime, actions in recorded.batches + [(None, [])]:
+            while True:
+                events = pg.event.get()
+                if any(event.type == pg.QUIT for event in events):
+                    return
+
+                elapsed = (pg.time.get_ticks() - start) * speed
+                if batchTime is not None and elapsed >= batchTime:
+                    break
+                if self._playing and self._gamestart:
+                    self._timer = min(int(elapsed // 1000), 999)
+                self.present(events)
+                clock.tick(FPS)
+
+            self._gamestart = True
+            self._timer = batchTime // 1000
+            self.apply_changes(self._game.apply(actions))
+            self.present([])
+            clock.tick(FPS)
 
 
     def mainLoop(self):
         """
         Main game loop that handles the constant updating of the interface and user inputs.
 
+        While anything is changing on screen the loop runs at up to FPS frames per second.
+        Once a frame draws nothing, the loop sleeps until the next event arrives instead,
+        which includes the one second timer event.
+
+        The mouse wheel zooms the board around the cursor and the arrow keys pan it, and
+        clicks are mapped to tiles through the camera.
+
         Args:
             None
         
@@ -785,8 +1218,12 @@ class MinesweeperApp(object):
 
         pg.time.set_timer(pg.USEREVENT, 1000)
         grid_clickable = True
+        animating = True
+        clock = pg.time.Clock()
+        frameStats = perf.FrameStats() if SHOW_FRAME_STATS else None
 
         while True:
+            actions = []
             current_menu = self._menu.get_current()
             current_menu_id = current_menu.get_id()
             
@@ -795,58 +1232,88 @@ class MinesweeperApp(object):
             elif current_menu_id == "home_menu_instance":
                 grid_clickable = True
             
-            events = pg.event.get()
+            if animating:
+                events = pg.event.get()
+            else:
+                events = [pg.event.wait()] + pg.event.get()
+
             for event in events:
                 if event.type == pg.QUIT:
+                    if boardPool:
+                        boardPool.close()
+                    db.close()
                     exit()
 
                 if self._gamestart and self._playing and grid_clickable and event.type == pg.USEREVENT:
                     self._timer += 1
 
-                elif event.type == pg.MOUSEBUTTONDOWN and grid_clickable:
-                    if event.pos[1] >= 100:
-                        y = int((event.pos[1] - 100) // TILE_SIZE)
-                        x = int(event.pos[0] // TILE_SIZE)
+                elif event.type == pg.MOUSEWHEEL and grid_clickable:
+                    self.move_camera(self._camera.zoom(ZOOM_STEP ** event.y, pg.mouse.get_pos()))
 
-                        if y < self._gridHeight and x < self._gridWidth and not self._gamestart:
-                            self._gamestart = True
+                # Buttons 4 and 5 are the mouse wheel, which is handled above
+                elif event.type == pg.MOUSEBUTTONDOWN and grid_clickable and event.button <= 3:
+                    cell = self._camera.screen_to_grid(event.pos)
 
-                        tile = self.grid[y][x]
+                    if cell is not None:
+                        y, x = cell
+                        self._gamestart = True
 
-                        try:
-                            if tile:
-                                if self._unknownTileCount == self._gridWidth * self._gridHeight:
-                                    self.generate_grid(y, x)
-                                    self.reveal_tiles(y, x)
+                        # A left click on a revealed number chords it, as does a middle click
+                        if event.button == 1:
+                            actions += [("reveal", y, x), ("chord", y, x)]
+                        elif event.button == 2:
+                            actions.append(("chord", y, x))
+                        elif event.button == 3:
+                            actions.append(("toggle_flag", y, x))
 
-                                if self._playing:
-                                    if event.button == 1 and not tile.flag:
-                                        self.reveal_tiles(y, x)
+            if actions and self._playing:
+                self.apply_actions(actions)
 
-                                        if tile.mine:
-                                            self.prompt(False)
+            # Keep panning every frame while an arrow key is held
+            panning = False
+            if grid_clickable:
+                keys = pg.key.get_pressed()
+                panX = (keys[pg.K_RIGHT] - keys[pg.K_LEFT]) * PAN_SPEED
+                panY = (keys[pg.K_DOWN] - keys[pg.K_UP]) * PAN_SPEED
+                panning = self.move_camera(self._camera.pan(panX, panY))
 
-                                        if self._unknownTileCount - 1 == self._mineCount:
-                                            self.prompt(True)
+            animating = self.present(events) or panning
+            if startup.first_frame() and SHOW_STARTUP_REPORT:
+                print(startup.report(STARTUP_BUDGET_MS))
 
-                                    elif event.button == 3 and not tile.clicked:
-                                        if not tile.flag and self._flagCount > 0:
-                                            tile.update = True
-                                            tile.flag = True
-                                            self._flagCount -= 1
-                                        elif tile.flag:
-                                            tile.update = True
-                                            tile.flag = False
-                                            self._flagCount += 1
+            if frameStats:
+                frameStats.frame(animating)
+            clock.tick(FPS)
 
-                        except IndexError:
-                            pass
 
-            self.draw_grid()
-            self.update_gui(events)
-            pg.display.flip()
+if __name__ == "__main__":
+    import argparse
+    import simulate
 
+    parser = argparse.ArgumentParser(description="Play Minesweeper.")
+    parser.add_argument("--size", type=simulate.parse_size, default=None,
+                        help="play a custom board size as WIDTHxHEIGHTxMINES, such as 200x150x4000")
+    parser.add_argument("--endless", action="store_true", help="play an endless board")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time taken by each phase of starting up, and exit after the first frame")
+    args = parser.parse_args()
+
+    if NO_GUESS_BOARDS:
+        boardPool = generator.BoardPool([size for _, *size in DIFFICULTIES])
+        boardPool.start()
 
-if __name__ == "__main__":
     App = MinesweeperApp()
+    if args.endless:
+        App.endless_select()
+    elif args.size:
+        App.custom_select(*args.size[1:])
+
+    if args.startup_report:
+        with startup.phase("draw"):
+            App.present([])
+        startup.first_frame()
+        print(startup.report(STARTUP_BUDGET_MS))
+        db.close()
+        exit(0 if startup.within(STARTUP_BUDGET_MS) else 1)
+
     App.mainLoop()
\ No newline at end of file
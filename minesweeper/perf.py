@@ -0,0 +1,169 @@
+"""
+Lightweight performance counters for the Minesweeper application. These only
+rely on the standard library, so they can be used by the game loop as well as
+any headless tools.
+"""
+
+import contextlib
+import time
+
+
+class FrameStats:
+    """
+    Measures how often the main loop runs and presents frames, and how much CPU
+    time each loop iteration costs, printing a summary at a fixed interval.
+
+    Attributes:
+        interval (float): The number of seconds between each printed report.
+        report (dict): The figures from the most recent report.
+    """
+
+    def __init__(self, interval=1.0):
+        """
+        Initializes the FrameStats object.
+
+        Args:
+            interval (float): The number of seconds between each printed report.
+
+        Returns:
+            None
+        """
+        self.interval = interval
+        self.report = {}
+        self._reset(time.perf_counter(), time.process_time())
+
+    def _reset(self, wall, cpu):
+        self._wallStart = wall
+        self._cpuStart = cpu
+        self._iterations = 0
+        self._presented = 0
+
+    def frame(self, presented):
+        """
+        Records the end of a main loop iteration, and prints a report if the
+        interval has elapsed.
+
+        Args:
+            presented (bool): Whether anything was pushed to the display this iteration.
+
+        Returns:
+            None
+        """
+        self._iterations += 1
+        if presented:
+            self._presented += 1
+
+        wall = time.perf_counter()
+        elapsed = wall - self._wallStart
+        if elapsed < self.interval:
+            return
+
+        cpu = time.process_time()
+        cpuTime = cpu - self._cpuStart
+        self.report = {
+            "loops_per_second": self._iterations / elapsed,
+            "frames_per_second": self._presented / elapsed,
+            "cpu_ms_per_loop": 1000 * cpuTime / self._iterations,
+            "cpu_percent": 100 * cpuTime / elapsed
+        }
+        print("{loops_per_second:.1f} loops/s, {frames_per_second:.1f} frames/s, "
+              "{cpu_ms_per_loop:.2f} ms CPU per loop, {cpu_percent:.1f}% CPU".format(**self.report))
+        self._reset(wall, cpu)
+
+
+class StartupTimer:
+    """
+    Measures how long each phase of starting the game takes, and the time until the
+    first frame is presented, so that startup can be kept within a budget.
+
+    Attributes:
+        start (float): The perf_counter time that startup began.
+        phases (dict): The seconds taken by each phase, in the order they finished.
+        firstFrame (float or None): The seconds from the start until the first frame was presented.
+    """
+
+    def __init__(self, start=None):
+        """
+        Initializes the StartupTimer object.
+
+        Args:
+            start (float or None): The perf_counter time that startup began, or None for now.
+
+        Returns:
+            None
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.phases = {}
+        self.firstFrame = None
+
+    def add(self, name, seconds):
+        """
+        Records the time taken by a phase, adding to it if the phase has been recorded before.
+
+        Args:
+            name (str): The name of the phase.
+            seconds (float): The time the phase took.
+
+        Returns:
+            None
+        """
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times the body of a `with` block as a phase.
+
+        Args:
+            name (str): The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def first_frame(self):
+        """
+        Records that a frame has been presented, if it is the first one.
+
+        Args:
+            None
+
+        Returns:
+            bool: True if this was the first frame.
+        """
+        if self.firstFrame is not None:
+            return False
+        self.firstFrame = time.perf_counter() - self.start
+        return True
+
+    def within(self, budget):
+        """
+        Returns whether the first frame was presented within a budget.
+
+        Args:
+            budget (float): The budget in milliseconds.
+
+        Returns:
+            bool: True if the first frame has been presented within the budget.
+        """
+        return self.firstFrame is not None and 1000 * self.firstFrame <= budget
+
+    def report(self, budget=None):
+        """
+        Formats the time taken by each phase, and the time until the first frame.
+
+        Args:
+            budget (float or None): The budget for the first frame in milliseconds, if any.
+
+        Returns:
+            str: The report, one phase to a line.
+        """
+        lines = ["{:<16}{:8.1f} ms".format(name, 1000 * seconds) for name, seconds in self.phases.items()]
+        if self.firstFrame is not None:
+            total = "{:<16}{:8.1f} ms".format("first frame", 1000 * self.firstFrame)
+            if budget is not None:
+                total += " ({} the budget of {} ms)".format("within" if self.within(budget) else "over", budget)
+            lines.append(total)
+        return "\n".join(lines)
@@ -0,0 +1,342 @@
+"""
+Deterministic replays of Minesweeper games. A replay stores the board size, the
+seed, the first click and the stream of action batches with the time each was
+applied, in a compact binary format. Because the engine is deterministic, this is
+enough to rebuild the game exactly without storing snapshots of the board.
+
+A replay can be played back headlessly, far faster than real time, or rendered in
+the pygame interface at its recorded pace:
+    python minesweeper/replay.py data/replays/game.msr
+    python minesweeper/replay.py data/replays/game.msr --render --speed 4
+
+File format (little-endian), version 2:
+    header:  magic b"MSRP", version (B), width (I), height (I), mine count (I),
+             seed (I), first click y and x (i, i; -1 if the board was never generated),
+             layout length (I)
+    layout:  the mine positions (I each), only stored when the board did not come from
+             the seed, such as a board taken from a no-guess pool
+    batches: batch count (I), then for each batch its time in milliseconds since the
+             first action (I) and action count (I), followed by each action as its
+             code (B), gridY (I) and gridX (I)
+
+Version 1 replays, which stored the sizes, coordinates and action counts in 16 bits,
+can still be loaded.
+"""
+
+import argparse
+import os
+import struct
+import time
+
+import engine
+
+MAGIC = b"MSRP"
+VERSION = 2
+
+# Action names of the Game, stored by their position in this tuple
+ACTIONS = ("reveal", "toggle_flag", "chord")
+
+PREFIX = struct.Struct("<4sB")
+# The header, batch and action structures of each version
+FORMATS = {
+    1: (struct.Struct("<4sBHHHIhhI"), struct.Struct("<IH"), struct.Struct("<BHH")),
+    2: (struct.Struct("<4sBIIIIiiI"), struct.Struct("<II"), struct.Struct("<BII"))
+}
+HEADER, BATCH, ACTION = FORMATS[VERSION]
+
+
+class RecordedLayout:
+    """
+    A source of mine layouts for a Game that always returns the layout of a replay.
+    """
+
+    def __init__(self, minePositions):
+        self.minePositions = minePositions
+
+    def take(self, width, height, mineCount, gridY, gridX):
+        return list(self.minePositions)
+
+
+class Replay:
+    """
+    A class to store, save and play back a recorded game.
+
+    Attributes:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines on the board.
+        seed (int): The seed the board was generated from.
+        firstClick (tuple or None): The (gridY, gridX) the board was generated around.
+        layout (list or None): The mine positions, if the board cannot be rebuilt from the seed.
+        batches (list): (milliseconds, actions) tuples in the order they were applied, where
+                        actions is a list of (action, gridY, gridX) tuples.
+    """
+
+    def __init__(self, width, height, mineCount, seed, firstClick=None, layout=None, batches=None):
+        """
+        Initializes the Replay object.
+
+        Args:
+            width (int): The number of tiles in each row.
+            height (int): The number of rows.
+            mineCount (int): The number of mines on the board.
+            seed (int): The seed the board was generated from.
+            firstClick (tuple or None): The (gridY, gridX) the board was generated around.
+            layout (list or None): The mine positions, if the board cannot be rebuilt from the seed.
+            batches (list or None): The recorded (milliseconds, actions) batches.
+
+        Returns:
+            None
+        """
+        self.width = width
+        self.height = height
+        self.mineCount = mineCount
+        self.seed = seed
+        self.firstClick = firstClick
+        self.layout = layout
+        self.batches = batches or []
+
+    @property
+    def duration(self):
+        """
+        float: The number of seconds between the first and last action.
+        """
+        return self.batches[-1][0] / 1000 if self.batches else 0.0
+
+    @property
+    def actionCount(self):
+        """
+        int: The total number of actions recorded.
+        """
+        return sum(len(actions) for _, actions in self.batches)
+
+    def new_game(self):
+        """
+        Creates a Game with the same board as the recorded game, ready to be played.
+
+        Args:
+            None
+
+        Returns:
+            engine.Game: The new game.
+        """
+        layouts = RecordedLayout(self.layout) if self.layout is not None else None
+        return engine.Game(self.width, self.height, self.mineCount, self.seed, layouts)
+
+    def play(self):
+        """
+        Re-simulate the recorded game headlessly, applying every batch as fast as possible.
+
+        Args:
+            None
+
+        Returns:
+            engine.Game: The game after the final batch.
+        """
+        game = self.new_game()
+        for _, actions in self.batches:
+            game.apply(actions)
+        return game
+
+    def to_bytes(self):
+        """
+        Encodes the replay in the binary replay format.
+
+        Args:
+            None
+
+        Returns:
+            bytes: The encoded replay.
+        """
+        firstY, firstX = self.firstClick if self.firstClick is not None else (-1, -1)
+        layout = self.layout or []
+
+        parts = [HEADER.pack(MAGIC, VERSION, self.width, self.height, self.mineCount,
+                             self.seed, firstY, firstX, len(layout)),
+                 struct.pack("<{}I".format(len(layout)), *layout),
+                 struct.pack("<I", len(self.batches))]
+        for milliseconds, actions in self.batches:
+            parts.append(BATCH.pack(milliseconds, len(actions)))
+            parts.extend(ACTION.pack(ACTIONS.index(action), gridY, gridX) for action, gridY, gridX in actions)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes a replay from the binary replay format.
+
+        Args:
+            data (bytes): The encoded replay.
+
+        Returns:
+            Replay: The decoded replay.
+
+        Raises:
+            ValueError: If the data is not a replay, or has an unsupported version.
+        """
+        try:
+            magic, version = PREFIX.unpack_from(data)
+            if magic != MAGIC:
+                raise ValueError("Not a Minesweeper replay")
+            if version not in FORMATS:
+                raise ValueError("Unsupported replay version: {}".format(version))
+
+            header, batch, action = FORMATS[version]
+            _, _, width, height, mineCount, seed, firstY, firstX, layoutLength = header.unpack_from(data)
+            offset = header.size
+            layout = list(struct.unpack_from("<{}I".format(layoutLength), data, offset)) if layoutLength else None
+            offset += 4 * layoutLength
+            (batchCount,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+
+            batches = []
+            for _ in range(batchCount):
+                milliseconds, actionCount = batch.unpack_from(data, offset)
+                offset += batch.size
+                actions = []
+                for _ in range(actionCount):
+                    code, gridY, gridX = action.unpack_from(data, offset)
+                    offset += action.size
+                    actions.append((ACTIONS[code], gridY, gridX))
+                batches.append((milliseconds, actions))
+        except (struct.error, IndexError):
+            raise ValueError("Replay data is truncated or corrupt")
+
+        firstClick = (firstY, firstX) if firstY >= 0 else None
+        return cls(width, height, mineCount, seed, firstClick, layout, batches)
+
+    def save(self, path, overwrite=True):
+        """
+        Save the replay to a file.
+
+        Args:
+            path (str): The path of the file.
+            overwrite (bool): Whether to replace a file already at the path, rather than
+                              raising FileExistsError.
+
+        Returns:
+            None
+        """
+        with open(path, "wb" if overwrite else "xb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a replay from a file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            Replay: The loaded replay.
+        """
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def prune(folder, keep):
+    """
+    Delete the oldest replays in a folder until at most a number of them are left.
+
+    Args:
+        folder (str): The folder holding the replays.
+        keep (int): The largest number of replays to keep.
+
+    Returns:
+        int: The number of replays deleted.
+    """
+    paths = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".msr")]
+    if len(paths) <= keep:
+        return 0
+    paths.sort(key=lambda path: (os.path.getmtime(path), path))
+    for path in paths[:len(paths) - keep]:
+        os.remove(path)
+    return len(paths) - keep
+
+
+class Recorder:
+    """
+    A class that applies action batches to a Game and records them for a Replay.
+
+    Attributes:
+        game (engine.Game): The game being recorded.
+        batches (list): The (milliseconds, actions) batches applied so far.
+    """
+
+    def __init__(self, game):
+        """
+        Initializes the Recorder object.
+
+        Args:
+            game (engine.Game): The game to record, before any actions have been applied.
+
+        Returns:
+            None
+        """
+        self.game = game
+        self.batches = []
+
+    def apply(self, milliseconds, actions):
+        """
+        Apply a batch of actions to the game and record it.
+
+        Args:
+            milliseconds (int): The time of the batch since the first action.
+            actions (list): (action, gridY, gridX) tuples, as taken by `engine.Game.apply`.
+
+        Returns:
+            list: The flat indexes of the tiles that changed.
+        """
+        actions = list(actions)
+        changed = self.game.apply(actions)
+        self.batches.append((milliseconds, actions))
+        return changed
+
+    def replay(self):
+        """
+        Returns the recorded game as a Replay.
+
+        A board generated without a seed cannot be rebuilt, so its mine positions are
+        stored in the replay instead, as are layouts taken from a pool.
+
+        Args:
+            None
+
+        Returns:
+            Replay: The recorded replay.
+        """
+        game = self.game
+        gameBoard = game.board
+        layout = game.layout
+        if layout is None and game.seed == 0 and gameBoard.generated:
+            layout = gameBoard.minePositions
+        return Replay(gameBoard.width, gameBoard.height, gameBoard.mineCount, game.seed,
+                      game.firstClick, layout, list(self.batches))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded Minesweeper game.")
+    parser.add_argument("path", help="the replay file")
+    parser.add_argument("--render", action="store_true", help="render the game in pygame at its recorded pace")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed when rendering (default: 1)")
+    args = parser.parse_args()
+
+    recorded = Replay.load(args.path)
+    if args.render:
+        import menu
+        menu.MinesweeperApp().play_replay(recorded, args.speed)
+        return
+
+    start = time.perf_counter()
+    game = recorded.play()
+    elapsed = time.perf_counter() - start
+
+    print("board      {}x{} with {} mines, seed {}".format(recorded.width, recorded.height, recorded.mineCount, recorded.seed))
+    print("actions    {} in {} batches".format(recorded.actionCount, len(recorded.batches)))
+    print("result     {} after {:.3f} s".format(game.state, recorded.duration))
+    print("simulated  in {:.3f} ms, {:.0f}x real time".format(1000 * elapsed, recorded.duration / elapsed if elapsed else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+A command line simulator that plays batches of headless Minesweeper games with a
+chosen policy, spreading the games across a pool of worker processes, and reports
+the throughput, win rate and distribution of game times.
+
+Example:
+    python minesweeper/simulate.py --games 100000 --difficulty easy hard --policy simple
+    python minesweeper/simulate.py --games 1000 --size 30x16x99 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+
+import board
+import engine
+from config import DIFFICULTIES
+from solver import SolverPolicy
+
+
+def first_click(game):
+    """
+    Returns the opening move used by every policy, which reveals the centre of the board.
+
+    Args:
+        game (engine.Game): The game being played.
+
+    Returns:
+        tuple: The action name, y-coordinate and x-coordinate.
+    """
+    return "reveal", game.board.height // 2, game.board.width // 2
+
+
+def random_policy(game, rng):
+    """
+    A policy that reveals a random unrevealed, unflagged tile.
+
+    Args:
+        game (engine.Game): The game being played.
+        rng (random.Random): The random number generator for this worker.
+
+    Returns:
+        tuple: The action name, y-coordinate and x-coordinate.
+    """
+    gameBoard = game.board
+    if not gameBoard.generated:
+        return first_click(game)
+
+    hidden = np.flatnonzero(~(gameBoard.revealed | gameBoard.flag))
+    index = int(hidden[rng.randrange(len(hidden))])
+    return ("reveal",) + divmod(index, gameBoard.width)
+
+
+def simple_policy(game, rng):
+    """
+    A policy that applies the single tile rules to each revealed number: chord it once
+    all of its mines are flagged, or flag its hidden neighbours when they must all be
+    mines. When no rule applies it falls back to a random reveal.
+
+    Args:
+        game (engine.Game): The game being played.
+        rng (random.Random): The random number generator for this worker.
+
+    Returns:
+        tuple: The action name, y-coordinate and x-coordinate.
+    """
+    gameBoard = game.board
+    if not gameBoard.generated:
+        return first_click(game)
+
+    revealedCells = gameBoard.revealedCells
+    flagCells = gameBoard.flagCells
+    countCells = gameBoard.countCells
+
+    for index in np.flatnonzero(gameBoard.revealed & (gameBoard.count > 0)).tolist():
+        hidden = []
+        flags = 0
+        for neighbour in gameBoard.neighbours(index):
+            if flagCells[neighbour]:
+                flags += 1
+            elif not revealedCells[neighbour]:
+                hidden.append(neighbour)
+
+        if not hidden:
+            continue
+        if flags == countCells[index]:
+            return ("chord",) + divmod(index, gameBoard.width)
+        if flags + len(hidden) == countCells[index]:
+            return ("toggle_flag",) + divmod(hidden[0], gameBoard.width)
+
+    return random_policy(game, rng)
+
+
+# Policies that can be selected by name. A policy takes the game and a random
+# number generator, and returns an action name of the Game with its coordinates.
+# A policy that keeps state between moves is a class, which is created for each
+# game and may have an update method that receives the tiles changed by each action.
+POLICIES = {
+    "random": random_policy,
+    "simple": simple_policy,
+    "solver": SolverPolicy
+}
+
+
+def play_game(game, policy, rng):
+    """
+    Play a game to the end with a policy.
+
+    Args:
+        game (engine.Game): The game to play.
+        policy (function): The policy choosing each action, or an instance of a policy class.
+        rng (random.Random): The random number generator for the policy.
+
+    Returns:
+        int: The number of actions taken.
+    """
+    moves = 0
+    # A policy that keeps choosing actions that change nothing would never finish
+    maxMoves = 2 * game.board.size
+    while not game.finished and moves < maxMoves:
+        action, gridY, gridX = policy(game, rng)
+        changed = getattr(game, action)(gridY, gridX)
+        if hasattr(policy, "update"):
+            policy.update(changed)
+        moves += 1
+    return moves
+
+
+def play_games(task):
+    """
+    Play a batch of games in a worker process.
+
+    Args:
+        task (tuple): The board width, height, mine count, policy name and list of seeds,
+                      with one game played per seed (a seed of 0 plays a random board).
+
+    Returns:
+        list: A (won, moves, seconds) tuple for each game.
+    """
+    width, height, mineCount, policyName, seeds = task
+    policy = POLICIES[policyName]
+    results = []
+    for seed in seeds:
+        rng = random.Random(seed or None)
+        start = time.perf_counter()
+        game = engine.Game(width, height, mineCount, seed)
+        moves = play_game(game, policy() if isinstance(policy, type) else policy, rng)
+        results.append((game.state == engine.WON, moves, time.perf_counter() - start))
+    return results
+
+
+def simulate(width, height, mineCount, games, policyName="simple", workers=None, seed=0):
+    """
+    Play a number of games on one board size across a pool of worker processes.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines on each board.
+        games (int): The number of games to play.
+        policyName (str): The name of the policy in POLICIES.
+        workers (int or None): The number of worker processes, defaulting to the CPU count.
+        seed (int): A base seed to make the run reproducible, or 0 for random boards.
+
+    Returns:
+        dict: The summary of the run.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = [seed + number if seed else 0 for number in range(games)]
+
+    # Enough batches to keep every worker busy, without paying for a task per game
+    batchSize = max(1, min(1000, games // (workers * 8)))
+    tasks = [(width, height, mineCount, policyName, seeds[start:start + batchSize])
+             for start in range(0, games, batchSize)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        batches = map(play_games, tasks)
+        results = [result for batch in batches for result in batch]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = [result for batch in pool.imap_unordered(play_games, tasks) for result in batch]
+    elapsed = time.perf_counter() - start
+
+    times = sorted(seconds for _, _, seconds in results)
+    if not results:
+        return {"games": 0, "seconds": elapsed, "games_per_second": 0.0, "win_rate": 0.0, "mean_moves": 0.0,
+                "mean_ms": 0.0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "games": len(results),
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed,
+        "win_rate": sum(won for won, _, _ in results) / len(results),
+        "mean_moves": statistics.fmean(moves for _, moves, _ in results),
+        "mean_ms": 1000 * statistics.fmean(times),
+        "p50_ms": 1000 * percentile(times, 50),
+        "p90_ms": 1000 * percentile(times, 90),
+        "p99_ms": 1000 * percentile(times, 99),
+        "max_ms": 1000 * times[-1]
+    }
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of a sorted list.
+
+    Args:
+        values (list): The sorted values.
+        percent (float): The percentile between 0 and 100.
+
+    Returns:
+        float: The value at that percentile.
+    """
+    rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def parse_size(text):
+    """
+    Parses a custom board size given as WIDTHxHEIGHTxMINES, such as 30x16x99, refusing
+    sizes that cannot be generated, such as boards that are too dense.
+
+    Args:
+        text (str): The board size.
+
+    Returns:
+        tuple: The name, width, height and mine count.
+    """
+    try:
+        width, height, mineCount = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("board size must be WIDTHxHEIGHTxMINES, such as 30x16x99")
+    try:
+        board.validate_size(width, height, mineCount)
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(str(err))
+    return text, width, height, mineCount
+
+
+def main():
+    difficultyNames = [name.lower() for name, _, _, _ in DIFFICULTIES]
+
+    parser = argparse.ArgumentParser(description="Play batches of headless Minesweeper games.")
+    parser.add_argument("--games", type=int, default=10000, help="games to play for each board size")
+    parser.add_argument("--difficulty", nargs="*", choices=difficultyNames, default=None,
+                        help="difficulty presets to play (default: all, unless --size is given)")
+    parser.add_argument("--size", type=parse_size, action="append", default=[],
+                        help="a custom board size as WIDTHxHEIGHTxMINES, can be repeated")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="simple", help="the policy that plays each game")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for reproducible boards (default: random)")
+    args = parser.parse_args()
+
+    if args.difficulty is None:
+        args.difficulty = [] if args.size else difficultyNames
+    boards = [DIFFICULTIES[difficultyNames.index(name)] for name in args.difficulty] + args.size
+
+    print("{:<12} {:>8} {:>10} {:>8} {:>7} {:>8} {:>8} {:>8} {:>8}".format(
+        "board", "games", "games/s", "win %", "moves", "mean ms", "p50 ms", "p90 ms", "p99 ms"))
+    for name, width, height, mineCount in boards:
+        try:
+            summary = simulate(width, height, mineCount, args.games, args.policy, args.workers, args.seed)
+        except ValueError as err:
+            print("{:<12} skipped: {}".format(name, err))
+            continue
+        print("{:<12} {games:>8} {games_per_second:>10.1f} {win:>8.2f} {mean_moves:>7.1f} {mean_ms:>8.3f} "
+              "{p50_ms:>8.3f} {p90_ms:>8.3f} {p99_ms:>8.3f}".format(name, win=100 * summary["win_rate"], **summary))
+
+
+if __name__ == "__main__":
+    main()
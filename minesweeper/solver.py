@@ -0,0 +1,477 @@
+"""
+A constraint propagation solver for Minesweeper boards. It deduces which hidden
+tiles are safe and which are mines from the revealed numbers, using single tile
+rules, rules between pairs of overlapping numbers, and a bounded enumeration of
+small groups of frontier tiles. The solver is updated incrementally with the tiles
+opened by each reveal, rather than re-solving the whole board.
+
+Running this module benchmarks the solver:
+    python minesweeper/solver.py --games 500 --size 24x20x99 --size 200x200x6000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+import engine
+
+
+class Solver:
+    """
+    A class that tracks the revealed frontier of a Board and deduces safe tiles and mines.
+
+    Each revealed number with hidden neighbours is a constraint: the hidden neighbours
+    that are not known to be mines must contain exactly its remaining number of mines.
+
+    Attributes:
+        board (board.Board): The board being solved.
+        safe (set): Hidden tiles deduced to be safe, which have not been revealed yet.
+        mines (set): Tiles deduced to be mines.
+        constraints (dict): The hidden neighbours and remaining mine count of each revealed number.
+        probabilities (dict): The chance of each enumerated frontier tile being a mine.
+        maxVariables (int): The largest group of frontier tiles that will be enumerated.
+    """
+
+    def __init__(self, gameBoard, maxVariables=24):
+        """
+        Initializes the Solver object with the tiles already revealed on the board.
+
+        Args:
+            gameBoard (board.Board): The board to solve.
+            maxVariables (int): The largest group of frontier tiles that will be enumerated.
+
+        Returns:
+            None
+        """
+        self.board = gameBoard
+        self.maxVariables = maxVariables
+        self.safe = set()
+        self.mines = set()
+        self.constraints = {}
+        self.probabilities = {}
+        self._queue = []
+        self.update(np.flatnonzero(gameBoard.revealed).tolist())
+
+    def update(self, changed):
+        """
+        Add the constraints from newly revealed tiles and propagate them.
+
+        Args:
+            changed (list): The flat indexes of tiles changed by an action. Tiles that
+                            are not revealed, such as newly flagged tiles, are ignored.
+
+        Returns:
+            None
+        """
+        gameBoard = self.board
+        revealedCells = gameBoard.revealedCells
+        constraints = self.constraints
+
+        for index in changed:
+            if not revealedCells[index] or gameBoard.mineCells[index]:
+                continue
+            self.safe.discard(index)
+            self.probabilities.pop(index, None)
+
+            neighbours = gameBoard.neighbours(index)
+            for neighbour in neighbours:
+                constraint = constraints.get(neighbour)
+                if constraint and index in constraint[0]:
+                    constraint[0].discard(index)
+                    self._queue.append(neighbour)
+
+            hidden = {neighbour for neighbour in neighbours
+                      if not revealedCells[neighbour] and neighbour not in self.mines and neighbour not in self.safe}
+            if hidden and index not in constraints:
+                remaining = gameBoard.countCells[index] - sum(neighbour in self.mines for neighbour in neighbours)
+                constraints[index] = [hidden, remaining]
+                self._queue.append(index)
+
+        self.propagate()
+
+    def propagate(self):
+        """
+        Apply the single tile and pair rules to every queued constraint until no more
+        deductions can be made.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        constraints = self.constraints
+        while self._queue:
+            index = self._queue.pop()
+            constraint = constraints.get(index)
+            if constraint is None:
+                continue
+
+            hidden, remaining = constraint
+            if not hidden:
+                del constraints[index]
+            elif remaining == 0:
+                for tile in list(hidden):
+                    self.mark_safe(tile)
+            elif remaining == len(hidden):
+                for tile in list(hidden):
+                    self.mark_mine(tile)
+            else:
+                for other in self.overlapping(index):
+                    if self.apply_pair_rules(index, other):
+                        break
+
+    def overlapping(self, index):
+        """
+        Returns the other constraints that share a hidden tile with a constraint.
+
+        Args:
+            index (int): The flat index of the revealed number.
+
+        Returns:
+            set: The flat indexes of the overlapping revealed numbers.
+        """
+        constraints = self.constraints
+        others = set()
+        for tile in constraints[index][0]:
+            for neighbour in self.board.neighbours(tile):
+                if neighbour in constraints:
+                    others.add(neighbour)
+        others.discard(index)
+        return others
+
+    def apply_pair_rules(self, first, second):
+        """
+        Compare two overlapping constraints. If the difference between their remaining
+        mines fills the tiles only one of them covers, those tiles are mines and the
+        tiles only the other covers are safe. If one constraint's mines must all lie in
+        the shared tiles, the tiles only the other covers are safe.
+
+        Args:
+            first (int): The flat index of a revealed number.
+            second (int): The flat index of an overlapping revealed number.
+
+        Returns:
+            bool: True if any tile was deduced.
+        """
+        for a, b in ((first, second), (second, first)):
+            hiddenA, remainingA = self.constraints[a]
+            hiddenB, remainingB = self.constraints[b]
+            onlyA = hiddenA - hiddenB
+            onlyB = hiddenB - hiddenA
+
+            if onlyB and remainingB - remainingA == len(onlyB):
+                for tile in onlyB:
+                    self.mark_mine(tile)
+                for tile in onlyA:
+                    self.mark_safe(tile)
+                return True
+
+            if onlyB and remainingA - len(onlyA) == remainingB:
+                for tile in onlyB:
+                    self.mark_safe(tile)
+                return True
+
+        return False
+
+    def mark_safe(self, tile):
+        """
+        Record a hidden tile as safe and remove it from every constraint.
+
+        Args:
+            tile (int): The flat index of the tile.
+
+        Returns:
+            None
+        """
+        if tile in self.safe or self.board.revealedCells[tile]:
+            return
+        self.safe.add(tile)
+        self.probabilities.pop(tile, None)
+        for neighbour in self.board.neighbours(tile):
+            constraint = self.constraints.get(neighbour)
+            if constraint and tile in constraint[0]:
+                constraint[0].discard(tile)
+                self._queue.append(neighbour)
+
+    def mark_mine(self, tile):
+        """
+        Record a hidden tile as a mine and remove it from every constraint, reducing
+        their remaining mine counts.
+
+        Args:
+            tile (int): The flat index of the tile.
+
+        Returns:
+            None
+        """
+        if tile in self.mines:
+            return
+        self.mines.add(tile)
+        self.probabilities.pop(tile, None)
+        for neighbour in self.board.neighbours(tile):
+            constraint = self.constraints.get(neighbour)
+            if constraint and tile in constraint[0]:
+                constraint[0].discard(tile)
+                constraint[1] -= 1
+                self._queue.append(neighbour)
+
+    def components(self):
+        """
+        Split the frontier into groups of hidden tiles that are linked by constraints.
+
+        Args:
+            None
+
+        Returns:
+            list: A (tiles, constraints) tuple of lists for each group.
+        """
+        constraints = self.constraints
+        seen = set()
+        groups = []
+        for start in constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            groupConstraints = []
+            groupTiles = set()
+            while stack:
+                index = stack.pop()
+                groupConstraints.append(index)
+                groupTiles.update(constraints[index][0])
+                for other in self.overlapping(index):
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            groups.append((sorted(groupTiles), groupConstraints))
+        return groups
+
+    def enumerate(self):
+        """
+        Enumerate every consistent arrangement of mines in each small frontier group.
+        Tiles that are never a mine are safe, tiles that are always a mine are mines,
+        and the rest have their mine probability recorded. Groups larger than
+        `maxVariables` are skipped, which bounds the work.
+
+        Args:
+            None
+
+        Returns:
+            bool: True if any tile was deduced.
+        """
+        deduced = False
+        self.probabilities = {}
+        for tiles, groupConstraints in self.components():
+            if len(tiles) > self.maxVariables:
+                continue
+
+            position = {tile: number for number, tile in enumerate(tiles)}
+            checks = [([position[tile] for tile in self.constraints[index][0]], self.constraints[index][1])
+                      for index in groupConstraints]
+            tileChecks = [[] for _ in tiles]
+            for number, (members, _) in enumerate(checks):
+                for member in members:
+                    tileChecks[member].append(number)
+
+            mineTotals = [0] * len(checks)
+            unassigned = [len(members) for members, _ in checks]
+            assignment = [0] * len(tiles)
+            mineCounts = [0] * len(tiles)
+            solutions = 0
+
+            def search(depth):
+                nonlocal solutions
+                if depth == len(tiles):
+                    solutions += 1
+                    for number, value in enumerate(assignment):
+                        mineCounts[number] += value
+                    return
+                for value in (0, 1):
+                    valid = True
+                    for number in tileChecks[depth]:
+                        mineTotals[number] += value
+                        unassigned[number] -= 1
+                        required = checks[number][1]
+                        if mineTotals[number] > required or mineTotals[number] + unassigned[number] < required:
+                            valid = False
+                    if valid:
+                        assignment[depth] = value
+                        search(depth + 1)
+                    for number in tileChecks[depth]:
+                        mineTotals[number] -= value
+                        unassigned[number] += 1
+
+            search(0)
+            if not solutions:
+                continue
+
+            for number, tile in enumerate(tiles):
+                if mineCounts[number] == 0:
+                    self.mark_safe(tile)
+                    deduced = True
+                elif mineCounts[number] == solutions:
+                    self.mark_mine(tile)
+                    deduced = True
+                else:
+                    self.probabilities[tile] = mineCounts[number] / solutions
+
+        self.propagate()
+        return deduced
+
+    def next_safe(self):
+        """
+        Returns a tile that is known to be safe, enumerating the frontier if the rules
+        alone have not found one.
+
+        Args:
+            None
+
+        Returns:
+            int or None: The flat index of a safe tile, or None if a guess is needed.
+        """
+        if not self.safe:
+            self.enumerate()
+        return next(iter(self.safe)) if self.safe else None
+
+    def guess(self, rng):
+        """
+        Choose the hidden tile least likely to be a mine, comparing the enumerated
+        frontier probabilities with the density of mines in the rest of the board.
+
+        Args:
+            rng (random.Random): Used to choose between equally likely tiles.
+
+        Returns:
+            int: The flat index of the tile to reveal.
+        """
+        gameBoard = self.board
+        hidden = ~gameBoard.revealed.reshape(-1)
+        hidden[list(self.mines)] = False
+        frontier = set()
+        for tiles, _ in self.constraints.values():
+            frontier.update(tiles)
+        interior = hidden.copy()
+        interior[list(frontier)] = False
+        interiorTiles = np.flatnonzero(interior)
+
+        best = min(self.probabilities, key=self.probabilities.get, default=None)
+        if len(interiorTiles):
+            interiorMines = gameBoard.mineCount - len(self.mines) - sum(
+                probability for probability in self.probabilities.values())
+            interiorChance = interiorMines / len(interiorTiles)
+            if best is None or interiorChance < self.probabilities[best]:
+                return int(interiorTiles[rng.randrange(len(interiorTiles))])
+        if best is not None:
+            return best
+
+        candidates = np.flatnonzero(hidden)
+        return int(candidates[rng.randrange(len(candidates))])
+
+
+class SolverPolicy:
+    """
+    A simulator policy that reveals tiles deduced by a Solver, and only guesses when
+    nothing can be deduced. A new instance is created for every game.
+
+    Attributes:
+        solver (Solver or None): The solver for the current game, once the board is generated.
+        guesses (int): The number of guesses made after the first click.
+    """
+
+    def __init__(self):
+        self.solver = None
+        self.guesses = 0
+
+    def __call__(self, game, rng):
+        gameBoard = game.board
+        if not gameBoard.generated:
+            return "reveal", gameBoard.height // 2, gameBoard.width // 2
+
+        if self.solver is None:
+            self.solver = Solver(gameBoard)
+
+        index = self.solver.next_safe()
+        if index is None:
+            index = self.solver.guess(rng)
+            self.guesses += 1
+        return ("reveal",) + divmod(index, gameBoard.width)
+
+    def update(self, changed):
+        if self.solver is not None:
+            self.solver.update(changed)
+
+
+def benchmark(width, height, mineCount, games, seed=1):
+    """
+    Time the solver playing a number of games, excluding the time spent generating
+    boards and revealing tiles.
+
+    Args:
+        width (int): The number of tiles in each row.
+        height (int): The number of rows.
+        mineCount (int): The number of mines on each board.
+        games (int): The number of games to play.
+        seed (int): The seed of the first board.
+
+    Returns:
+        dict: The summary of the benchmark.
+    """
+    solverTime = 0
+    tilesSolved = 0
+    wins = 0
+    guessFree = 0
+
+    for number in range(games):
+        rng = random.Random(seed + number)
+        game = engine.Game(width, height, mineCount, seed + number)
+        policy = SolverPolicy()
+        game.reveal(*policy(game, rng)[1:])
+
+        while not game.finished:
+            start = time.perf_counter()
+            action, gridY, gridX = policy(game, rng)
+            solverTime += time.perf_counter() - start
+
+            changed = getattr(game, action)(gridY, gridX)
+
+            start = time.perf_counter()
+            policy.update(changed)
+            solverTime += time.perf_counter() - start
+            tilesSolved += len(changed)
+
+        wins += game.state == engine.WON
+        guessFree += game.state == engine.WON and policy.guesses == 0
+
+    return {
+        "games": games,
+        "solver_seconds": solverTime,
+        "games_per_second": games / solverTime,
+        "tiles_per_second": tilesSolved / solverTime,
+        "win_rate": wins / games,
+        "guess_free_rate": guessFree / games
+    }
+
+
+def main():
+    import simulate
+
+    parser = argparse.ArgumentParser(description="Benchmark the Minesweeper solver.")
+    parser.add_argument("--games", type=int, default=500, help="games to play for each board size")
+    parser.add_argument("--size", type=simulate.parse_size, action="append", default=[],
+                        help="a board size as WIDTHxHEIGHTxMINES, can be repeated (default: 24x20x99)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first board")
+    args = parser.parse_args()
+
+    print("{:<14} {:>7} {:>10} {:>12} {:>8} {:>12}".format(
+        "board", "games", "games/s", "tiles/s", "win %", "no guess %"))
+    for name, width, height, mineCount in args.size or [simulate.parse_size("24x20x99")]:
+        summary = benchmark(width, height, mineCount, args.games, args.seed)
+        print("{:<14} {games:>7} {games_per_second:>10.1f} {tiles_per_second:>12.0f} {win:>8.2f} {noGuess:>12.2f}".format(
+            name, win=100 * summary["win_rate"], noGuess=100 * summary["guess_free_rate"], **summary))
+
+
+if __name__ == "__main__":
+    main()
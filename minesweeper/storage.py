@@ -0,0 +1,926 @@
+"""
+Storage backends for the users and scores of the Minesweeper application. The
+Database class keeps the leaderboard cache and background writer, and stores its
+data through one of these backends:
+
+    SQLiteStorage   a SQLite file, or ":memory:", with WAL journaling and a connection pool
+    MemoryStorage   plain Python structures, for tests and simulations
+    NetworkStorage  a client for a StorageServer, which serves any other backend over TCP
+
+Running this module checks that each backend behaves the same and measures its
+throughput, using a local stand-in server for the networked backend:
+    python minesweeper/storage.py --backend sqlite memory network --scores 20000
+"""
+
+import abc
+import argparse
+import contextlib
+import json
+import os
+import queue
+import random
+import socket
+import socketserver
+import sqlite3
+import tempfile
+import threading
+import time
+from sqlite3 import Error
+
+# Size of the page cache of each SQLite connection, in kibibytes
+CACHE_SIZE_KB = 8192
+
+# Schema migrations, applied in order by `SQLiteStorage.migrate`. Applying the migration at
+# position N takes the schema from version N to N + 1. The version is stored in PRAGMA
+# user_version, and version 0 is the tables made by `create_tables`.
+MIGRATIONS = [
+    [
+        # Merge any duplicate usernames into the oldest user before making them unique
+        """UPDATE scores SET user_id = (SELECT MIN(duplicate.id) FROM users AS original
+                                        JOIN users AS duplicate ON duplicate.username = original.username
+                                        WHERE original.id = scores.user_id)
+           WHERE user_id IN (SELECT id FROM users)""",
+        """DELETE FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY username)""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users(username)""",
+        """CREATE INDEX IF NOT EXISTS scores_difficulty_score ON scores(difficulty, score)""",
+        """CREATE INDEX IF NOT EXISTS scores_user_difficulty ON scores(user_id, difficulty, score)"""
+    ],
+    [
+        # Keep the best score of each user in each difficulty, updated by `add_scores`, so a
+        # leaderboard reads only its places through the (difficulty, score) index
+        """CREATE TABLE IF NOT EXISTS best_scores(
+               user_id INTEGER NOT NULL,
+               difficulty INTEGER NOT NULL,
+               score INTEGER NOT NULL,
+               date TIMESTAMP NOT NULL,
+               PRIMARY KEY (user_id, difficulty))""",
+        """INSERT OR REPLACE INTO best_scores(user_id, difficulty, score, date)
+           SELECT user_id, difficulty, MIN(score), date FROM scores GROUP BY user_id, difficulty""",
+        """CREATE INDEX IF NOT EXISTS best_scores_difficulty_score ON best_scores(difficulty, score, user_id)""",
+        # The leaderboard no longer reads the scores by difficulty
+        """DROP INDEX IF EXISTS scores_difficulty_score"""
+    ]
+]
+
+# Queries shared by the methods that run them and `query_plans`
+SQL_INSERT_SCORE = """INSERT INTO scores(score, difficulty, date, user_id) VALUES (?, ?, ?, ?)"""
+SQL_USER_ID = """SELECT id FROM users WHERE username=?"""
+SQL_HIGHSCORE = """SELECT MIN(score), date FROM scores WHERE user_id=? AND difficulty=?"""
+SQL_BEST_SCORE = """INSERT INTO best_scores(user_id, difficulty, score, date) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, difficulty) DO UPDATE SET score = excluded.score, date = excluded.date
+                    WHERE excluded.score < best_scores.score"""
+SQL_LEADERBOARD = """SELECT best_scores.score, best_scores.user_id, users.username, best_scores.date
+                     FROM best_scores JOIN users ON users.id = best_scores.user_id
+                     WHERE best_scores.difficulty = ?
+                     ORDER BY best_scores.score ASC, best_scores.user_id ASC
+                     LIMIT ?"""
+
+
+def full_scans(plans):
+    """
+    Finds the steps of query plans that read a whole table or index rather than searching it.
+
+    Args:
+        plans (dict): The lines of each query plan by name, such as from `SQLiteStorage.query_plans`.
+
+    Returns:
+        list: A "name: line" description of each step that scans.
+    """
+    return ["{}: {}".format(name, line) for name, plan in plans.items() for line in plan if line.startswith("SCAN")]
+
+
+class StorageError(Exception):
+    """
+    An error raised by a backend for a request it could not carry out, such as an error
+    returned by a StorageServer.
+    """
+
+
+# Errors after which a write may succeed if it is tried again. A SQLite error is only
+# retryable if the database was locked or busy, as checked by `is_retryable`
+RETRYABLE_ERRORS = (sqlite3.OperationalError, ConnectionError, TimeoutError)
+
+
+def is_retryable(err):
+    """
+    Returns whether a call that failed may succeed if it is tried again, such as a write
+    to a database that another connection has locked. Permanent SQLite errors, such as a
+    read-only database or a missing table, are not retryable.
+
+    Args:
+        err (Exception): The error the call raised.
+
+    Returns:
+        bool: True if the call may be tried again.
+    """
+    if isinstance(err, sqlite3.OperationalError):
+        message = str(err).lower()
+        return "locked" in message or "busy" in message
+    return isinstance(err, RETRYABLE_ERRORS)
+
+
+class Storage(abc.ABC):
+    """
+    The interface of a storage backend. Dates are stored and returned as strings.
+
+    Every method may be called from any thread. A backend that does not implement every
+    abstract method cannot be created, and the abstract methods are the ones a
+    StorageServer will call for a client.
+    """
+
+    @abc.abstractmethod
+    def create_tables(self):
+        """
+        Prepares the storage for use, creating or upgrading its tables if needed.
+        """
+
+    @abc.abstractmethod
+    def create_user(self, username, join_date):
+        """
+        Creates a user if no user has the username yet.
+
+        Args:
+            username (str): The username of the user.
+            join_date (str): The date the user joined.
+
+        Returns:
+            int: The ID of the user with the username.
+        """
+
+    @abc.abstractmethod
+    def get_user(self, user_id):
+        """
+        Retrieves a user by ID.
+
+        Args:
+            user_id (int): The user's ID.
+
+        Returns:
+            tuple or None: The (id, username, join_date) of the user, or None if the user doesn't exist.
+        """
+
+    @abc.abstractmethod
+    def add_scores(self, rows):
+        """
+        Adds scores in a single transaction.
+
+        Args:
+            rows (list): (score, difficulty, date, user_id) tuples.
+
+        Returns:
+            int or None: The ID of the last score added, or None if there were no rows.
+        """
+
+    @abc.abstractmethod
+    def get_leaderboard(self, limit, difficulties):
+        """
+        Retrieves the best score of each user, ranked by score and then by user ID within
+        each difficulty.
+
+        Args:
+            limit (int): The number of places to retrieve for each difficulty.
+            difficulties (int): The number of difficulty levels.
+
+        Returns:
+            list: A list for each difficulty of (score, user_id, username, date) tuples in order of place.
+        """
+
+    @abc.abstractmethod
+    def get_highscore(self, difficulty, user_id):
+        """
+        Retrieves the best score of a user in a difficulty.
+
+        Args:
+            difficulty (int): The difficulty level.
+            user_id (int): The user's ID.
+
+        Returns:
+            tuple: The (score, date) of the best score, or (None, None) if there is none.
+        """
+
+    @abc.abstractmethod
+    def get_all_data(self):
+        """
+        Retrieves every user and score.
+
+        Returns:
+            tuple: A list of (id, username, join_date) users, and a list of
+                   (id, score, date, difficulty, user_id) scores ordered by difficulty.
+        """
+
+    @abc.abstractmethod
+    def purge(self):
+        """
+        Deletes every user and score.
+        """
+
+    def close(self):
+        """
+        Releases any connections held by the backend.
+        """
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of connections to a SQLite database, with a single writer connection
+    that one thread holds at a time and a number of read-only reader connections.
+
+    With WAL journaling, readers see the last committed data while a write is in progress,
+    so leaderboard views and exports never wait for score writes, and writes never wait
+    for readers.
+
+    Attributes:
+        readers (int): The number of reader connections. With no readers, reads share the
+                       writer connection, which is needed for an in-memory database.
+    """
+
+    def __init__(self, connect, readers=2):
+        """
+        Initializes the ConnectionPool object.
+
+        Args:
+            connect (function): Opens a connection, given True for a read-only connection.
+            readers (int): The number of reader connections.
+
+        Returns:
+            None
+        """
+        self.readers = readers
+        self._writer = connect(False)
+        self._writerLock = threading.Lock()
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(connect(True))
+
+    @contextlib.contextmanager
+    def reader(self):
+        """
+        Borrows a reader connection, waiting for one to be returned if all are in use.
+
+        Yields:
+            sqlite3.Connection: The reader connection.
+        """
+        if not self.readers:
+            with self._writerLock:
+                yield self._writer
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextlib.contextmanager
+    def writer(self):
+        """
+        Holds the writer connection for a transaction, which is committed when the block
+        ends, or rolled back if it raises an exception.
+
+        Yields:
+            sqlite3.Connection: The writer connection.
+        """
+        with self._writerLock:
+            with self._writer:
+                yield self._writer
+
+    def close(self):
+        """
+        Closes every connection in the pool.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        with self._writerLock:
+            self._writer.close()
+        for _ in range(self.readers):
+            self._readers.get().close()
+
+
+class SQLiteStorage(Storage):
+    """
+    A backend that stores the data in a SQLite database.
+
+    Attributes:
+        db_file (str): The path to the SQLite database file, or ":memory:".
+        journalMode (str): The SQLite journal mode of the database file.
+        timeout (float): The seconds a connection waits for a locked database.
+        pool (ConnectionPool): The reader and writer connections to the database.
+    """
+
+    def __init__(self, db_file, readers=2, journalMode="WAL", timeout=5):
+        """
+        Initializes the SQLiteStorage object.
+
+        Args:
+            db_file (str): The path to the SQLite database file, or ":memory:".
+            readers (int): The number of reader connections in the pool.
+            journalMode (str): The SQLite journal mode to use, such as "WAL" or "DELETE".
+            timeout (float): The seconds a connection waits for a locked database.
+
+        Returns:
+            None
+        """
+        self.db_file = db_file
+        self.journalMode = journalMode
+        self.timeout = timeout
+        # Every connection to an in-memory database opens a separate database
+        inMemory = db_file == ":memory:"
+        self.pool = ConnectionPool(self.initiate_connection, 0 if inMemory else readers)
+
+    def initiate_connection(self, readOnly=False):
+        """
+        Establishes a database connection that can be used from any thread, tuned for the
+        game's small, frequent transactions. A writer connection also sets the journal mode.
+
+        Args:
+            readOnly (bool): True to open a connection that cannot write to the database.
+
+        Returns:
+            sqlite3.Connection or None: The database connection or None if connection failed.
+        """
+        try:
+            conn = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False)
+            if not readOnly:
+                conn.execute("PRAGMA journal_mode={}".format(self.journalMode))
+            # Synchronous NORMAL is safe in WAL mode, and skips a sync on every commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-{}".format(CACHE_SIZE_KB))
+            conn.execute("PRAGMA temp_store=MEMORY")
+            if readOnly:
+                conn.execute("PRAGMA query_only=ON")
+            return conn
+        except Error as err:
+            print("initiate_connection error:")
+            print(err)
+            return None
+
+    def create_tables(self):
+        """
+        Creates 'users' and 'scores' tables if they don't exist in the database, then applies
+        any pending migrations.
+        """
+        sql_users_table = """CREATE TABLE IF NOT EXISTS users(
+                            id INTEGER NOT NULL PRIMARY KEY,
+                            username TEXT NOT NULL,
+                            join_date TIMESTAMP NOT NULL)
+                            """
+        sql_scores_table = """CREATE TABLE IF NOT EXISTS scores(
+                            id INTEGER NOT NULL PRIMARY KEY,
+                            score INTEGER NOT NULL,
+                            date TIMESTAMP NOT NULL,
+                            difficulty INTEGER NOT NULL,
+                            user_id INTEGER NOT NULL,
+                            FOREIGN KEY (user_id) REFERENCES users (id))
+                            """
+        try:
+            with self.pool.writer() as conn:
+                cur = conn.cursor()
+                cur.execute(sql_users_table)
+                cur.execute(sql_scores_table)
+        except Error as err:
+            print("create_tables error:")
+            print(err)
+        self.migrate()
+
+    def migrate(self):
+        """
+        Applies any schema migrations that have not yet been applied to the database,
+        each in its own transaction along with the new schema version.
+
+        Args:
+            None
+
+        Returns:
+            int: The schema version of the database.
+        """
+        with self.pool.reader() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number in range(version, len(MIGRATIONS)):
+            try:
+                with self.pool.writer() as conn:
+                    cur = conn.cursor()
+                    for sql in MIGRATIONS[number]:
+                        cur.execute(sql)
+                    cur.execute("PRAGMA user_version = {}".format(number + 1))
+            except Error as err:
+                print("migrate error:")
+                print(err)
+                break
+            version = number + 1
+        return version
+
+    def query_plans(self):
+        """
+        Retrieves the query plan SQLite chooses for each of the frequent queries.
+
+        Args:
+            None
+
+        Returns:
+            dict: The lines of the EXPLAIN QUERY PLAN output for each query, by name.
+        """
+        queries = {
+            "create_user": (SQL_USER_ID, ("Guest",)),
+            "get_highscore": (SQL_HIGHSCORE, (1, 0)),
+            "get_leaderboard": (SQL_LEADERBOARD, (0, 3))
+        }
+        plans = {}
+        # EXPLAIN does not read the database, so a reader opened before a migration would
+        # plan with its old schema. The writer always has the current one.
+        with self.pool.writer() as conn:
+            cur = conn.cursor()
+            for name, (sql, parameters) in queries.items():
+                cur.execute("EXPLAIN QUERY PLAN " + sql, parameters)
+                plans[name] = [row[3] for row in cur.fetchall()]
+        return plans
+
+    def create_user(self, username, join_date):
+        sql_insert_user = """INSERT INTO users(username, join_date) VALUES (?, ?)"""
+        with self.pool.writer() as conn:
+            cur = conn.cursor()
+            cur.execute(SQL_USER_ID, (username,))
+            if not cur.fetchone():
+                cur.execute(sql_insert_user, (username, join_date))
+            cur.execute(SQL_USER_ID, (username,))
+            return cur.fetchone()[0]
+
+    def get_user(self, user_id):
+        with self.pool.reader() as conn:
+            return conn.execute("SELECT * FROM users WHERE id=?", (user_id,)).fetchone()
+
+    def add_scores(self, rows):
+        if not rows:
+            return None
+        with self.pool.writer() as conn:
+            cur = conn.cursor()
+            cur.executemany(SQL_INSERT_SCORE, rows)
+            lastId = cur.execute("SELECT last_insert_rowid()").fetchone()[0]
+            cur.executemany(SQL_BEST_SCORE, [(user_id, difficulty, score, date) for score, difficulty, date, user_id in rows])
+            return lastId
+
+    def get_leaderboard(self, limit, difficulties):
+        # One indexed search for each difficulty, reading only the places it returns
+        with self.pool.reader() as conn:
+            return [conn.execute(SQL_LEADERBOARD, (difficulty, limit)).fetchall() for difficulty in range(difficulties)]
+
+    def get_highscore(self, difficulty, user_id):
+        with self.pool.reader() as conn:
+            return conn.execute(SQL_HIGHSCORE, (user_id, difficulty)).fetchone()
+
+    def get_all_data(self):
+        sql_users_query = """SELECT * FROM users"""
+        sql_scores_query = """SELECT * FROM scores ORDER BY difficulty ASC"""
+        with self.pool.reader() as conn:
+            cur = conn.cursor()
+            users = cur.execute(sql_users_query).fetchall()
+            scores = cur.execute(sql_scores_query).fetchall()
+        return users, scores
+
+    def purge(self):
+        sql_delete_users = """DELETE FROM users"""
+        sql_delete_scores = """DELETE FROM scores"""
+        sql_delete_best_scores = """DELETE FROM best_scores"""
+        try:
+            with self.pool.writer() as conn:
+                cur = conn.cursor()
+                cur.execute(sql_delete_users)
+                cur.execute(sql_delete_scores)
+                cur.execute(sql_delete_best_scores)
+        except Error as err:
+            print("purge_data error:")
+            print(err)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+
+class MemoryStorage(Storage):
+    """
+    A backend that keeps the data in memory, for tests and simulations. The best score
+    of each user in each difficulty is kept up to date as scores are added, so neither
+    leaderboards nor highscores scan the scores.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty MemoryStorage object.
+        """
+        self._lock = threading.Lock()
+        self._users = {}
+        self._userIds = {}
+        self._scores = []
+        # The (score, date) of the best score of each (user_id, difficulty)
+        self._best = {}
+
+    def create_tables(self):
+        pass
+
+    def create_user(self, username, join_date):
+        with self._lock:
+            if username not in self._userIds:
+                user_id = len(self._users) + 1
+                self._users[user_id] = (user_id, username, join_date)
+                self._userIds[username] = user_id
+            return self._userIds[username]
+
+    def get_user(self, user_id):
+        with self._lock:
+            return self._users.get(user_id)
+
+    def add_scores(self, rows):
+        with self._lock:
+            for score, difficulty, date, user_id in rows:
+                self._scores.append((len(self._scores) + 1, score, date, difficulty, user_id))
+                best = self._best.get((user_id, difficulty))
+                if best is None or score < best[0]:
+                    self._best[(user_id, difficulty)] = (score, date)
+            return len(self._scores) if rows else None
+
+    def get_leaderboard(self, limit, difficulties):
+        leaderboard = [[] for _ in range(difficulties)]
+        with self._lock:
+            for (user_id, difficulty), (score, date) in self._best.items():
+                if difficulty < difficulties and user_id in self._users:
+                    leaderboard[difficulty].append((score, user_id, self._users[user_id][1], date))
+        for places in leaderboard:
+            places.sort(key=lambda place: (place[0], place[1]))
+            del places[limit:]
+        return leaderboard
+
+    def get_highscore(self, difficulty, user_id):
+        with self._lock:
+            return self._best.get((user_id, difficulty), (None, None))
+
+    def get_all_data(self):
+        with self._lock:
+            users = list(self._users.values())
+            scores = sorted(self._scores, key=lambda row: row[3])
+        return users, scores
+
+    def purge(self):
+        with self._lock:
+            self._users.clear()
+            self._userIds.clear()
+            self._scores.clear()
+            self._best.clear()
+
+
+class NetworkStorage(Storage):
+    """
+    A backend that sends each call to a StorageServer over TCP, one JSON object per line.
+    Calls from several threads share the connection, one at a time.
+
+    If a call times out or the connection fails, the connection is closed, so a reply that
+    arrives late can never be read as the answer to a later call, and a new connection is
+    opened. The error is still raised, as the call may or may not have been carried out.
+
+    Attributes:
+        address (tuple): The (host, port) of the server.
+        timeout (float): The seconds to wait for the server to reply.
+    """
+
+    def __init__(self, host, port, timeout=5):
+        """
+        Initializes the NetworkStorage object and connects to the server.
+
+        Args:
+            host (str): The host name of the server.
+            port (int): The port of the server.
+            timeout (float): The seconds to wait for the server to reply.
+
+        Returns:
+            None
+        """
+        self.address = (host, port)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket = None
+        self._file = None
+        self._connect()
+
+    def _connect(self):
+        """
+        Opens a new connection to the server.
+        """
+        self._socket = socket.create_connection(self.address, timeout=self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._socket.makefile("rwb")
+
+    def _disconnect(self):
+        """
+        Closes the connection to the server, discarding anything that has not been read.
+        """
+        for stream in (self._file, self._socket):
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+        self._file = None
+        self._socket = None
+
+    def _reconnect(self):
+        """
+        Replaces a connection that has failed. If the server cannot be reached, the
+        next call tries again.
+        """
+        self._disconnect()
+        try:
+            self._connect()
+        except OSError:
+            self._disconnect()
+
+    def _call(self, method, *args):
+        """
+        Calls a method of the backend served by the server.
+
+        Args:
+            method (str): The name of the method.
+            *args: The arguments of the method.
+
+        Returns:
+            object: The result of the method, with JSON arrays returned as tuples.
+
+        Raises:
+            StorageError: If the server could not carry out the call.
+            TimeoutError: If the server did not reply in time.
+            ConnectionError: If the connection to the server was lost.
+        """
+        request = json.dumps({"method": method, "args": args}).encode() + b"\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._connect()
+                self._file.write(request)
+                self._file.flush()
+                line = self._file.readline()
+                if not line:
+                    raise ConnectionError("Storage server closed the connection")
+            except (TimeoutError, ConnectionError):
+                self._reconnect()
+                raise
+            # Such as an operation on a stream that has already failed
+            except (OSError, ValueError) as err:
+                self._reconnect()
+                raise ConnectionError("Storage server connection failed: {}".format(err)) from err
+
+        reply = json.loads(line)
+        if "error" in reply:
+            raise StorageError(reply["error"])
+        return reply["result"]
+
+    def create_tables(self):
+        self._call("create_tables")
+
+    def create_user(self, username, join_date):
+        return self._call("create_user", username, join_date)
+
+    def get_user(self, user_id):
+        user = self._call("get_user", user_id)
+        return tuple(user) if user is not None else None
+
+    def add_scores(self, rows):
+        return self._call("add_scores", [list(row) for row in rows])
+
+    def get_leaderboard(self, limit, difficulties):
+        return [[tuple(place) for place in places] for places in self._call("get_leaderboard", limit, difficulties)]
+
+    def get_highscore(self, difficulty, user_id):
+        return tuple(self._call("get_highscore", difficulty, user_id))
+
+    def get_all_data(self):
+        users, scores = self._call("get_all_data")
+        return [tuple(user) for user in users], [tuple(score) for score in scores]
+
+    def purge(self):
+        self._call("purge")
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class StorageServer(socketserver.ThreadingTCPServer):
+    """
+    A TCP server that serves a backend to NetworkStorage clients, with a thread for each
+    client. It can stand in for a shared leaderboard server when testing locally.
+
+    Attributes:
+        backend (Storage): The backend the calls are made on.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, backend, host="127.0.0.1", port=0):
+        """
+        Initializes the StorageServer object and binds it to its address.
+
+        Args:
+            backend (Storage): The backend the calls are made on.
+            host (str): The host name to listen on.
+            port (int): The port to listen on, or 0 for any free port.
+
+        Returns:
+            None
+        """
+        self.backend = backend
+        super().__init__((host, port), StorageHandler)
+
+    def serve_in_background(self):
+        """
+        Serves clients from a background thread.
+
+        Args:
+            None
+
+        Returns:
+            tuple: The (host, port) the server is listening on.
+        """
+        threading.Thread(target=self.serve_forever, name="StorageServer", daemon=True).start()
+        return self.server_address
+
+
+class StorageHandler(socketserver.StreamRequestHandler):
+    """
+    Handles the calls of one NetworkStorage client.
+    """
+
+    def handle(self):
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        backend = self.server.backend
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request["method"] not in Storage.__abstractmethods__:
+                    raise StorageError("Unknown method: {}".format(request["method"]))
+                reply = {"result": getattr(backend, request["method"])(*request["args"])}
+            except Exception as err:
+                reply = {"error": "{}: {}".format(type(err).__name__, err)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+def open_storage(location, **options):
+    """
+    Opens the backend for a location.
+
+    Args:
+        location (str): "memory:" for a MemoryStorage, "tcp://host:port" for a NetworkStorage,
+                        or otherwise the path of a SQLite database file.
+        **options: Options passed to SQLiteStorage, such as readers, journalMode and timeout,
+                   which other backends ignore.
+
+    Returns:
+        Storage: The opened backend.
+    """
+    if location == "memory:":
+        return MemoryStorage()
+    if location.startswith("tcp://"):
+        host, port = location[len("tcp://"):].rsplit(":", 1)
+        return NetworkStorage(host, int(port))
+    return SQLiteStorage(location, **options)
+
+
+def check_conformance(backend):
+    """
+    Checks that a backend behaves as the Storage interface describes. The backend is purged.
+
+    Args:
+        backend (Storage): The backend to check.
+
+    Returns:
+        list: A description of each check that failed.
+    """
+    failures = []
+
+    def check(name, actual, expected):
+        if actual != expected:
+            failures.append("{}: expected {!r}, got {!r}".format(name, expected, actual))
+
+    backend.create_tables()
+    backend.purge()
+
+    ada = backend.create_user("ada", "2024-01-01 00:00:00")
+    check("create_user returns the same ID for a username", backend.create_user("ada", "2024-02-02 00:00:00"), ada)
+    bob = backend.create_user("bob", "2024-01-02 00:00:00")
+    cy = backend.create_user("cy", "2024-01-03 00:00:00")
+    check("create_user gives each username its own ID", len({ada, bob, cy}), 3)
+    check("get_user", backend.get_user(ada), (ada, "ada", "2024-01-01 00:00:00"))
+    check("get_user of an unknown ID", backend.get_user(max(ada, bob, cy) + 1000), None)
+    check("add_scores with no rows", backend.add_scores([]), None)
+    check("get_highscore with no scores", backend.get_highscore(0, ada), (None, None))
+
+    backend.add_scores([(30, 0, "d1", ada), (20, 0, "d2", ada), (25, 0, "d3", bob),
+                        (20, 0, "d4", cy), (50, 1, "d5", bob), (10, 2, "d6", cy)])
+    check("get_highscore", backend.get_highscore(0, ada), (20, "d2"))
+    check("get_highscore in another difficulty", backend.get_highscore(1, bob), (50, "d5"))
+
+    # Ties are ranked by user ID, and each user appears once with their best score
+    tied = sorted([(20, ada, "ada", "d2"), (20, cy, "cy", "d4")], key=lambda place: place[1])
+    check("get_leaderboard", backend.get_leaderboard(3, 3),
+          [tied + [(25, bob, "bob", "d3")], [(50, bob, "bob", "d5")], [(10, cy, "cy", "d6")]])
+    check("get_leaderboard limit", backend.get_leaderboard(1, 2), [tied[:1], [(50, bob, "bob", "d5")]])
+
+    users, scores = backend.get_all_data()
+    check("get_all_data users", len(users), 3)
+    check("get_all_data scores", [score[3] for score in scores], [0, 0, 0, 0, 1, 2])
+
+    backend.purge()
+    check("purge", backend.get_all_data(), ([], []))
+    return failures
+
+
+def measure_throughput(backend, scores=20000, users=100, batchSize=100, reads=2000, seed=1):
+    """
+    Measures how quickly a backend adds scores and answers leaderboard and highscore reads.
+    The backend is purged before and after.
+
+    Args:
+        backend (Storage): The backend to measure.
+        scores (int): The number of scores to add.
+        users (int): The number of users the scores are spread across.
+        batchSize (int): The number of scores added in each call to add_scores.
+        reads (int): The number of leaderboard and of highscore reads.
+        seed (int): The seed for the random scores.
+
+    Returns:
+        dict: The scores written, leaderboards read and highscores read per second.
+    """
+    rng = random.Random(seed)
+    backend.create_tables()
+    backend.purge()
+    userIds = [backend.create_user("user{}".format(number), "2024-01-01 00:00:00") for number in range(users)]
+    rows = [(rng.randint(1, 999), rng.randrange(3), "2024-01-01 00:00:00", rng.choice(userIds)) for _ in range(scores)]
+
+    start = time.perf_counter()
+    for offset in range(0, scores, batchSize):
+        backend.add_scores(rows[offset:offset + batchSize])
+    writeSeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        backend.get_leaderboard(3, 3)
+    leaderboardSeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for number in range(reads):
+        backend.get_highscore(number % 3, userIds[number % users])
+    highscoreSeconds = time.perf_counter() - start
+
+    backend.purge()
+    return {
+        "scores_per_second": scores / writeSeconds,
+        "leaderboards_per_second": reads / leaderboardSeconds,
+        "highscores_per_second": reads / highscoreSeconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and measure the storage backends.")
+    parser.add_argument("--backend", nargs="*", choices=["sqlite", "memory", "network"],
+                        default=["sqlite", "memory", "network"], help="backends to run (default: all)")
+    parser.add_argument("--scores", type=int, default=20000, help="scores to write to each backend")
+    parser.add_argument("--batch", type=int, default=100, help="scores written in each transaction")
+    parser.add_argument("--reads", type=int, default=2000, help="leaderboard and highscore reads")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        print("{:<10} {:>12} {:>14} {:>16} {:>16}".format(
+            "backend", "conformance", "scores/s", "leaderboards/s", "highscores/s"))
+        for name in args.backend:
+            server = None
+            if name == "sqlite":
+                backend = SQLiteStorage(os.path.join(folder, "storage.sqlite"))
+            elif name == "memory":
+                backend = MemoryStorage()
+            else:
+                # A local stand-in for a shared server, backed by its own SQLite file
+                server = StorageServer(SQLiteStorage(os.path.join(folder, "server.sqlite")))
+                backend = NetworkStorage(*server.serve_in_background())
+
+            failures = check_conformance(backend)
+            results = measure_throughput(backend, args.scores, batchSize=args.batch, reads=args.reads)
+            print("{:<10} {:>12} {scores_per_second:>14.0f} {leaderboards_per_second:>16.0f} "
+                  "{highscores_per_second:>16.0f}".format(name, "ok" if not failures else "FAILED", **results))
+            for failure in failures:
+                print("    " + failure)
+            failed = failed or bool(failures)
+
+            backend.close()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                server.backend.close()
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
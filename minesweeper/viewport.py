@@ -0,0 +1,193 @@
+"""
+The camera used to draw boards of any size in the Minesweeper application. It maps
+between screen pixels and grid coordinates for a view that can be panned and zoomed,
+and finds the range of tiles inside the view, so the interface only draws and
+hit-tests the tiles that are on screen. This module does not depend on pygame.
+"""
+
+
+class Camera:
+    """
+    A class to pan and zoom a view of a grid of square tiles.
+
+    The view is a fixed rectangle of the screen. The camera's offset is the position of
+    the view's top left corner on the board, in pixels at the current tile size, so the
+    tile at (gridY, gridX) is drawn at `viewX + gridX * tileSize - offsetX` across and
+    `viewY + gridY * tileSize - offsetY` down. A board smaller than the view is drawn
+    from the view's top left corner. A board with no width and height, such as an
+    endless board, has no edges to keep the view within.
+
+    Attributes:
+        gridWidth (int or None): The number of tiles in each row, or None for an endless board.
+        gridHeight (int or None): The number of rows, or None for an endless board.
+        view (tuple): The (x, y, width, height) of the view on the screen.
+        minTileSize (int): The smallest tile size the camera can zoom out to.
+        maxTileSize (int): The largest tile size the camera can zoom in to.
+        tileSize (int): The current size of each tile in pixels.
+        offsetX, offsetY (int): The position of the view on the board in pixels.
+    """
+
+    def __init__(self, gridWidth, gridHeight, view, tileSize, minTileSize, maxTileSize):
+        """
+        Initializes a Camera object centred on the board, or on the tile at (0, 0) of an
+        endless board.
+
+        Args:
+            gridWidth (int or None): The number of tiles in each row, or None for an endless board.
+            gridHeight (int or None): The number of rows, or None for an endless board.
+            view (tuple): The (x, y, width, height) of the view on the screen.
+            tileSize (int): The starting size of each tile in pixels.
+            minTileSize (int): The smallest tile size the camera can zoom out to.
+            maxTileSize (int): The largest tile size the camera can zoom in to.
+
+        Returns:
+            None
+        """
+        self.gridWidth = gridWidth
+        self.gridHeight = gridHeight
+        self.view = view
+        self.minTileSize = minTileSize
+        self.maxTileSize = maxTileSize
+        self.tileSize = max(minTileSize, min(tileSize, maxTileSize))
+        self.offsetX = ((gridWidth or 1) * self.tileSize - view[2]) // 2
+        self.offsetY = ((gridHeight or 1) * self.tileSize - view[3]) // 2
+        self.clamp()
+
+    def clamp(self):
+        """
+        Keep the view on the board, pinning each axis to the start of the board where
+        the board is smaller than the view. An endless board is never clamped.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.gridWidth is None:
+            return
+
+        _, _, viewWidth, viewHeight = self.view
+        self.offsetX = max(0, min(self.offsetX, self.gridWidth * self.tileSize - viewWidth))
+        self.offsetY = max(0, min(self.offsetY, self.gridHeight * self.tileSize - viewHeight))
+
+    def pan(self, dx, dy):
+        """
+        Move the view across the board.
+
+        Args:
+            dx (int): The number of pixels to move right.
+            dy (int): The number of pixels to move down.
+
+        Returns:
+            bool: True if the view moved.
+        """
+        before = (self.offsetX, self.offsetY)
+        self.offsetX += dx
+        self.offsetY += dy
+        self.clamp()
+        return (self.offsetX, self.offsetY) != before
+
+    def zoom(self, factor, anchor):
+        """
+        Scale the tiles, keeping the point of the board under an anchor in place.
+
+        Args:
+            factor (float): The amount to scale the tile size by, above 1 to zoom in.
+            anchor (tuple): The (x, y) screen position to zoom around, such as the mouse.
+
+        Returns:
+            bool: True if the tile size changed.
+        """
+        tileSize = round(self.tileSize * factor)
+        if tileSize == self.tileSize:
+            tileSize += 1 if factor > 1 else -1
+        tileSize = max(self.minTileSize, min(tileSize, self.maxTileSize))
+        if tileSize == self.tileSize:
+            return False
+
+        viewX, viewY, _, _ = self.view
+        anchorX = anchor[0] - viewX
+        anchorY = anchor[1] - viewY
+        boardX = (anchorX + self.offsetX) / self.tileSize
+        boardY = (anchorY + self.offsetY) / self.tileSize
+
+        self.tileSize = tileSize
+        self.offsetX = round(boardX * tileSize - anchorX)
+        self.offsetY = round(boardY * tileSize - anchorY)
+        self.clamp()
+        return True
+
+    def visible_range(self):
+        """
+        Returns the tiles that are at least partly inside the view.
+
+        Args:
+            None
+
+        Returns:
+            tuple: The (firstY, lastY, firstX, lastX) of the visible tiles, where each last
+                   coordinate is exclusive.
+        """
+        _, _, viewWidth, viewHeight = self.view
+        size = self.tileSize
+        firstY = self.offsetY // size
+        firstX = self.offsetX // size
+        lastY = -(-(self.offsetY + viewHeight) // size)
+        lastX = -(-(self.offsetX + viewWidth) // size)
+        if self.gridWidth is not None:
+            lastY = min(lastY, self.gridHeight)
+            lastX = min(lastX, self.gridWidth)
+        return firstY, lastY, firstX, lastX
+
+    def is_visible(self, gridY, gridX):
+        """
+        Returns whether a tile is at least partly inside the view.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+
+        Returns:
+            bool: True if the tile is visible.
+        """
+        firstY, lastY, firstX, lastX = self.visible_range()
+        return firstY <= gridY < lastY and firstX <= gridX < lastX
+
+    def grid_to_screen(self, gridY, gridX):
+        """
+        Returns the screen position of the top left corner of a tile.
+
+        Args:
+            gridY (int): The y-coordinate of the tile.
+            gridX (int): The x-coordinate of the tile.
+
+        Returns:
+            tuple: The (x, y) pixel position of the tile on the screen.
+        """
+        viewX, viewY, _, _ = self.view
+        return (viewX + gridX * self.tileSize - self.offsetX,
+                viewY + gridY * self.tileSize - self.offsetY)
+
+    def screen_to_grid(self, position):
+        """
+        Returns the tile under a screen position, such as a mouse click.
+
+        Args:
+            position (tuple): The (x, y) pixel position on the screen.
+
+        Returns:
+            tuple or None: The (gridY, gridX) of the tile, or None if the position is not
+                           over a tile inside the view.
+        """
+        viewX, viewY, viewWidth, viewHeight = self.view
+        x = position[0] - viewX
+        y = position[1] - viewY
+        if not (0 <= x < viewWidth and 0 <= y < viewHeight):
+            return None
+
+        gridY = (y + self.offsetY) // self.tileSize
+        gridX = (x + self.offsetX) // self.tileSize
+        if self.gridWidth is not None and (gridY >= self.gridHeight or gridX >= self.gridWidth):
+            return None
+        return gridY, gridX
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The game's modules import each other by name, as when run from the minesweeper folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "minesweeper"))
@@ -0,0 +1,20 @@
+import pytest
+
+import board
+
+
+@pytest.mark.parametrize("width, height, mineCount", [(1, 1, 0), (3, 2, 1), (2, 2, 2), (9, 9, 10), (30, 16, 99)])
+def test_validate_size_accepts_boards_that_can_be_generated(width, height, mineCount):
+    board.validate_size(width, height, mineCount)
+    for gridY in range(min(height, 3)):
+        for gridX in range(min(width, 3)):
+            gameBoard = board.Board(width, height, mineCount)
+            gameBoard.generate(gridY, gridX, seed=1)
+            assert sum(gameBoard.mineCells) == mineCount
+            assert not gameBoard.mineCells[gameBoard.index(gridY, gridX)]
+
+
+@pytest.mark.parametrize("width, height, mineCount", [(0, 5, 0), (5, 0, 0), (5, 5, -1), (1, 1, 1), (10, 10, 60)])
+def test_validate_size_refuses_boards_that_cannot_be_generated(width, height, mineCount):
+    with pytest.raises(ValueError):
+        board.validate_size(width, height, mineCount)
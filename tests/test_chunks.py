@@ -0,0 +1,51 @@
+import numpy as np
+
+import chunks
+
+
+def make_chunk(chunkY, chunkX, size=16):
+    return chunks.Chunk(chunkY, chunkX, np.zeros((size, size), dtype=bool), np.zeros((size, size), dtype=np.uint8))
+
+
+def test_store_reuses_the_record_of_a_chunk_saved_again():
+    store = chunks.ChunkStore()
+    chunk = make_chunk(0, 0)
+    store.save(chunk)
+    size = store.size
+    for _ in range(100):
+        store.save(chunk)
+    assert store.size == size
+    assert store.unused == 0
+    store.close()
+
+
+def test_store_compacts_replaced_records(monkeypatch):
+    monkeypatch.setattr(chunks.ChunkStore, "COMPACT_MIN_BYTES", 1)
+    rng = np.random.default_rng(1)
+    store = chunks.ChunkStore()
+    saved = {}
+    for number in range(200):
+        chunk = make_chunk(number % 5, 0)
+        # Each save reveals more random tiles, so the record no longer fits its old slot
+        chunk.revealedCells[:] = (rng.random(len(chunk.revealedCells)) < number / 200).astype(np.uint8).tobytes()
+        store.save(chunk)
+        saved[(chunk.chunkY, chunk.chunkX)] = bytes(chunk.revealedCells)
+
+    assert store.compactions > 0
+    assert store.unused <= store.COMPACT_RATIO * store.size
+    store.file.seek(0, 2)
+    assert store.file.tell() == store.size
+    for (chunkY, chunkX), revealed in saved.items():
+        chunk = make_chunk(chunkY, chunkX)
+        assert store.load(chunk)
+        assert bytes(chunk.revealedCells) == revealed
+    store.close()
+
+
+def test_endless_game_is_a_game_on_a_chunked_board():
+    game = chunks.EndlessGame(seed=3, chunkSize=8, cacheSize=4)
+    assert isinstance(game.board, chunks.ChunkedBoard)
+    assert game.board.chunkSize == 8 and game.board.cacheSize == 4
+    assert game.state == chunks.engine.READY
+    game.apply([("reveal", 0, 0)])
+    assert game.board.revealedCount > 0
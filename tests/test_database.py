@@ -0,0 +1,18 @@
+import database
+
+
+def test_cached_score_does_not_read_the_user(monkeypatch):
+    db = database.Database("memory:")
+    try:
+        db.create_tables()
+        ada = db.create_user("ada")
+        db.get_leaderboard()
+
+        def get_user(user_id):
+            raise AssertionError("get_user was called for {}".format(user_id))
+
+        monkeypatch.setattr(db.backend, "get_user", get_user)
+        assert db.queue_score(5, 0, ada)
+        assert [place[:2] for place in db.get_leaderboard()[0]] == [("ada", 5)]
+    finally:
+        db.close()
@@ -0,0 +1,97 @@
+import os
+import shutil
+
+import pytest
+
+import storage
+
+REPO_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "database.sqlite")
+
+
+def test_full_scans_catches_scans_through_an_index():
+    plans = {
+        "searched": ["SEARCH scores USING INDEX scores_user_difficulty (user_id=? AND difficulty=?)"],
+        "scanned": ["SCAN scores USING INDEX scores_user_difficulty", "SCAN users"]
+    }
+    assert storage.full_scans(plans) == ["scanned: SCAN scores USING INDEX scores_user_difficulty",
+                                         "scanned: SCAN users"]
+
+
+def test_query_plans_search_a_new_database(tmp_path):
+    backend = storage.SQLiteStorage(str(tmp_path / "storage.sqlite"))
+    try:
+        backend.create_tables()
+        assert storage.full_scans(backend.query_plans()) == []
+    finally:
+        backend.close()
+
+
+def test_query_plans_search_a_migrated_database(tmp_path):
+    path = str(tmp_path / "database.sqlite")
+    shutil.copy(REPO_DATABASE, path)
+    backend = storage.SQLiteStorage(path)
+    try:
+        backend.create_tables()
+        assert storage.full_scans(backend.query_plans()) == []
+    finally:
+        backend.close()
+
+
+def test_migration_keeps_the_best_scores(tmp_path):
+    path = str(tmp_path / "database.sqlite")
+    backend = storage.SQLiteStorage(path)
+    try:
+        backend.create_tables()
+        ada = backend.create_user("ada", "2024-01-01 00:00:00")
+        backend.add_scores([(30, 0, "d1", ada), (20, 0, "d2", ada), (40, 1, "d3", ada)])
+        # Rebuild the table as the migration would from the scores alone
+        with backend.pool.writer() as conn:
+            conn.execute("DROP TABLE best_scores")
+            conn.execute("PRAGMA user_version = 1")
+        backend.migrate()
+        assert backend.get_leaderboard(3, 2) == [[(20, ada, "ada", "d2")], [(40, ada, "ada", "d3")]]
+    finally:
+        backend.close()
+
+
+@pytest.fixture(params=["sqlite", "memory", "network"])
+def backend(request, tmp_path):
+    server = None
+    if request.param == "sqlite":
+        backend = storage.SQLiteStorage(str(tmp_path / "storage.sqlite"))
+    elif request.param == "memory":
+        backend = storage.MemoryStorage()
+    else:
+        server = storage.StorageServer(storage.SQLiteStorage(str(tmp_path / "server.sqlite")))
+        backend = storage.NetworkStorage(*server.serve_in_background())
+    yield backend
+    backend.close()
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        server.backend.close()
+
+
+def test_backend_conforms_to_the_interface(backend):
+    assert storage.check_conformance(backend) == []
+
+
+def test_incomplete_backend_cannot_be_created():
+    class IncompleteStorage(storage.Storage):
+        def create_tables(self):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteStorage()
+
+
+def test_server_refuses_methods_outside_the_interface():
+    server = storage.StorageServer(storage.MemoryStorage())
+    backend = storage.NetworkStorage(*server.serve_in_background())
+    try:
+        with pytest.raises(storage.StorageError):
+            backend._call("close")
+    finally:
+        backend.close()
+        server.shutdown()
+        server.server_close()